@@ -1,93 +1,269 @@
 import av
+import io
+import numpy as np
 import wave
 import os
 import openai
-import math
+import queue
+import threading
 
 # Set your OpenAI API key
 openai.api_key = ""
 
 CHUNK_DURATION_SEC = 300  # Split audio into 5-minute chunks
+SAMPLE_RATE = 16000  # Whisper works on 16 kHz mono audio
+SAMPLE_WIDTH = 2  # 16-bit samples
+MAX_WORKERS = 4  # Chunks transcribed concurrently
+QUEUE_SIZE = 4  # Decoded chunks allowed to wait for a worker
 
+# Silence detection for chunk boundaries
+SILENCE_TOLERANCE_SEC = 15  # How far a boundary may move to land on silence
+SILENCE_FRAME_LEN = 480  # 30 ms analysis frames at 16 kHz
+SILENCE_THRESHOLD_DB = -40  # Frames quieter than this (dBFS) count as silence
+MIN_SILENCE_SEC = 2  # Silent spans at least this long are cut when skipping silence
+SKIP_SILENCE = False  # Cut long silences out of chunks to save billable audio
 
-def extract_audio_from_mp4(mp4_file, output_wav="output.wav"):
+
+def make_wav_buffer(pcm, name):
+    """
+    Wraps raw 16-bit mono PCM in an in-memory WAV file.
+
+    :param pcm: Raw PCM bytes.
+    :param name: File name reported to the API, used to detect the format.
+    :return: BytesIO positioned at the start of the WAV data.
     """
-    Extracts audio from an MP4 file and saves it as a WAV file using PyAV.
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(SAMPLE_WIDTH)  # 16-bit
+        wav_file.setframerate(SAMPLE_RATE)  # 16 kHz
+        wav_file.writeframes(pcm)
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+def frame_energies(samples, frame_len=SILENCE_FRAME_LEN):
+    """
+    Computes the RMS level of every full analysis frame in one vectorized pass.
+
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param frame_len: Samples per analysis frame.
+    :return: Array of frame levels in dBFS.
+    """
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-9) / 32768)
+
+
+def find_split_point(samples, target, tolerance, frame_len=SILENCE_FRAME_LEN,
+                     threshold_db=SILENCE_THRESHOLD_DB):
+    """
+    Picks the chunk boundary closest to ``target`` that falls on silence.
+
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param target: Preferred boundary, in samples.
+    :param tolerance: How far the boundary may move either way, in samples.
+    :param frame_len: Samples per analysis frame.
+    :param threshold_db: Frames quieter than this count as silence.
+    :return: Boundary in samples. Falls back to the quietest frame in the
+             window when it holds no silence.
+    """
+    start = max(target - tolerance, 0)
+    energies = frame_energies(samples[start:target + tolerance], frame_len)
+    if not len(energies):
+        return target
+    centers = start + np.arange(len(energies)) * frame_len + frame_len // 2
+    silent = np.flatnonzero(energies < threshold_db)
+    if len(silent):
+        best = silent[np.argmin(np.abs(centers[silent] - target))]
+    else:
+        best = np.argmin(energies)
+    return int(centers[best])
+
+
+def drop_silence(samples, frame_len=SILENCE_FRAME_LEN, threshold_db=SILENCE_THRESHOLD_DB,
+                 min_silence_sec=MIN_SILENCE_SEC):
+    """
+    Removes silent spans of at least ``min_silence_sec``, keeping shorter pauses.
+
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param frame_len: Samples per analysis frame.
+    :param threshold_db: Frames quieter than this count as silence.
+    :param min_silence_sec: Shortest silent span that is removed.
+    :return: int16 NumPy array with the long silent spans cut out.
+    """
+    silent = frame_energies(samples, frame_len) < threshold_db
+    # Run-length encode the silent frames and mark the runs that are long enough
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    long_runs = (ends - starts) * frame_len >= min_silence_sec * SAMPLE_RATE
+    marks = np.zeros(len(silent) + 1, dtype=np.int32)
+    np.add.at(marks, starts[long_runs], 1)
+    np.add.at(marks, ends[long_runs], -1)
+    drop = np.cumsum(marks[:-1]) > 0
+
+    keep = np.ones(len(samples), dtype=bool)
+    keep[:len(drop) * frame_len] = np.repeat(~drop, frame_len)
+    if len(drop) and drop[-1]:
+        keep[len(drop) * frame_len:] = False  # Partial frame at the end of a dropped span
+    return samples[keep]
+
+
+def extract_audio_chunks(mp4_file, chunk_duration_sec=CHUNK_DURATION_SEC,
+                         tolerance_sec=SILENCE_TOLERANCE_SEC, skip_silence=SKIP_SILENCE):
+    """
+    Decodes the audio of an MP4 file with PyAV and yields in-memory WAV chunks
+    of roughly ``chunk_duration_sec``, without writing the audio to disk.
+
+    Each boundary is moved to the nearest silence within ``tolerance_sec`` of the
+    nominal cut so words are not split between chunks.
 
     :param mp4_file: Path to the MP4 video file.
-    :param output_wav: Path to save the extracted WAV file.
+    :param chunk_duration_sec: Nominal duration of each chunk in seconds.
+    :param tolerance_sec: How far a boundary may move to land on silence.
+    :param skip_silence: Cut long silent spans out of the chunks and skip
+                         chunks that are entirely silent.
+    :return: Generator of WAV buffers (BytesIO) in playback order.
     """
-    try:
-        container = av.open(mp4_file)
-        audio_stream = next(s for s in container.streams if s.type == "audio")
-        resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    chunk_samples = int(chunk_duration_sec * SAMPLE_RATE)
+    tolerance = min(int(tolerance_sec * SAMPLE_RATE), chunk_samples // 2)
+    pcm = bytearray()
+    index = 0
+    total_samples = kept_samples = 0
 
-        with wave.open(output_wav, "wb") as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(16000)  # 16 kHz
+    def make_chunk(chunk_pcm):
+        nonlocal index, total_samples, kept_samples
+        samples = np.frombuffer(chunk_pcm, dtype=np.int16)
+        total_samples += len(samples)
+        if skip_silence:
+            samples = drop_silence(samples)
+            if not len(samples):
+                return None
+        kept_samples += len(samples)
+        index += 1
+        return make_wav_buffer(samples.tobytes(), f"chunk_{index}.wav")
+
+    try:
+        with av.open(mp4_file) as container:
+            audio_stream = next(s for s in container.streams if s.type == "audio")
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
 
             for frame in container.decode(audio_stream):
-                resampled_frames = resampler.resample(frame)
-                for resampled_frame in resampled_frames:
-                    wav_file.writeframes(resampled_frame.to_ndarray().tobytes())
+                for resampled_frame in resampler.resample(frame):
+                    pcm += resampled_frame.to_ndarray().tobytes()
+                    # Wait for the full tolerance window past the nominal cut
+                    while len(pcm) >= (chunk_samples + tolerance) * SAMPLE_WIDTH:
+                        split = find_split_point(np.frombuffer(pcm, dtype=np.int16), chunk_samples, tolerance)
+                        chunk = make_chunk(bytes(pcm[:split * SAMPLE_WIDTH]))
+                        del pcm[:split * SAMPLE_WIDTH]
+                        if chunk is not None:
+                            yield chunk
 
-        print(f"Audio extracted and saved to: {output_wav}")
-        return output_wav
+            # Flush samples still buffered in the resampler
+            for resampled_frame in resampler.resample(None):
+                pcm += resampled_frame.to_ndarray().tobytes()
+
+        if pcm:
+            chunk = make_chunk(bytes(pcm))
+            if chunk is not None:
+                yield chunk
+        skipped_sec = (total_samples - kept_samples) / SAMPLE_RATE
+        print(f"Audio extracted into {index} chunks ({skipped_sec:.1f}s of silence skipped)")
     except Exception as e:
         print(f"Error extracting audio: {e}")
         raise
 
 
-def split_audio(wav_file, chunk_duration_sec=CHUNK_DURATION_SEC):
+def transcribe_chunk(audio):
     """
-    Splits a WAV file into smaller chunks.
+    Transcribes a single WAV chunk using OpenAI Whisper.
 
-    :param wav_file: Path to the WAV file.
-    :param chunk_duration_sec: Duration of each chunk in seconds.
-    :return: List of chunk file paths.
+    :param audio: File-like WAV object with a ``name`` attribute.
+    :return: Transcribed text.
     """
-    chunk_files = []
-    try:
-        with wave.open(wav_file, "rb") as wf:
-            n_channels = wf.getnchannels()
-            sampwidth = wf.getsampwidth()
-            framerate = wf.getframerate()
-            n_frames = wf.getnframes()
-            total_duration_sec = n_frames / framerate
-
-            chunk_frames = int(chunk_duration_sec * framerate)
-
-            for i in range(math.ceil(total_duration_sec / chunk_duration_sec)):
-                chunk_file = f"chunk_{i + 1}.wav"
-                with wave.open(chunk_file, "wb") as chunk_wf:
-                    chunk_wf.setnchannels(n_channels)
-                    chunk_wf.setsampwidth(sampwidth)
-                    chunk_wf.setframerate(framerate)
-                    chunk_wf.writeframes(wf.readframes(chunk_frames))
-                chunk_files.append(chunk_file)
-                print(f"Chunk {i + 1} saved: {chunk_file}")
-        return chunk_files
-    except Exception as e:
-        print(f"Error splitting audio: {e}")
-        raise
+    response = openai.Audio.transcribe("whisper-1", audio)
+    return response.get("text", "")
 
 
-def transcribe_audio_chunks(chunk_files, output_file="transcription.txt"):
+def stub_transcribe(audio):
     """
-    Transcribes a list of audio chunks using OpenAI Whisper and saves the transcription.
+    Offline stand-in for transcribe_chunk, for tests and dry runs.
 
-    :param chunk_files: List of WAV chunk file paths.
+    :param audio: File-like WAV object with a ``name`` attribute.
+    :return: Placeholder text describing the chunk.
+    """
+    with wave.open(audio, "rb") as wf:
+        duration_sec = wf.getnframes() / wf.getframerate()
+    return f"[{audio.name}: {duration_sec:.1f}s of audio]"
+
+
+def transcribe_audio_chunks(chunks, output_file="transcription.txt", transcribe=transcribe_chunk,
+                            max_workers=MAX_WORKERS, queue_size=QUEUE_SIZE):
+    """
+    Transcribes audio chunks as they are produced and saves the transcription in order.
+
+    The calling thread pulls chunks from ``chunks`` (e.g. the decoder) and puts them on
+    a bounded queue that worker threads consume, so transcription of the first chunk
+    starts while later chunks are still being decoded. The decoder blocks whenever the
+    queue is full, which keeps memory flat regardless of recording length.
+
+    :param chunks: Iterable of WAV buffers in playback order.
     :param output_file: Path to save the transcription text.
+    :param transcribe: Function turning one chunk into text.
+    :param max_workers: Maximum number of chunks transcribed at once.
+    :param queue_size: Maximum number of decoded chunks waiting for a worker.
+    :return: List of chunk transcriptions in playback order.
     """
+    work = queue.Queue(maxsize=queue_size)
+    texts = {}
+    errors = []
+    failed = threading.Event()
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            i, chunk = item
+            if failed.is_set():
+                continue  # Drain the queue without doing more work
+            try:
+                print(f"Transcribing chunk {i + 1}...")
+                texts[i] = transcribe(chunk)
+            except Exception as e:
+                errors.append(e)
+                failed.set()
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for thread in workers:
+        thread.start()
+
     try:
+        try:
+            for item in enumerate(chunks):
+                if failed.is_set():
+                    break
+                work.put(item)  # Blocks while the queue is full
+        except Exception:
+            failed.set()
+            raise
+        finally:
+            for _ in workers:
+                work.put(None)
+            for thread in workers:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+
+        ordered = [texts[i] for i in sorted(texts)]
         with open(output_file, "w") as transcript_file:
-            for i, chunk in enumerate(chunk_files):
-                print(f"Transcribing chunk {i + 1}...")
-                with open(chunk, "rb") as audio:
-                    response = openai.Audio.transcribe("whisper-1", audio)
-                transcript_file.write(response.get("text", "") + "\n")
+            for text in ordered:
+                transcript_file.write(text + "\n")
         print(f"Transcription saved to: {output_file}")
+        return ordered
     except Exception as e:
         print(f"Error during transcription: {e}")
         raise
@@ -99,23 +275,8 @@ if __name__ == "__main__":
     if not os.path.exists(video_file_path):
         print("Error: File not found. Please provide a valid file path.")
     else:
-        try:
-            # Step 1: Extract audio
-            wav_file = extract_audio_from_mp4(video_file_path)
+        # Step 1: Decode audio into in-memory chunks (lazily, as a generator)
+        chunks = extract_audio_chunks(video_file_path)
 
-            # Step 2: Split audio into chunks
-            chunk_files = split_audio(wav_file)
-
-            # Step 3: Transcribe each chunk
-            transcribe_audio_chunks(chunk_files)
-
-        finally:
-            # Clean up temporary files
-            if os.path.exists("output.wav"):
-                os.remove("output.wav")
-                print("Temporary audio file deleted.")
-
-            for chunk in chunk_files:
-                if os.path.exists(chunk):
-                    os.remove(chunk)
-            print("Temporary chunk files deleted.")
+        # Step 2: Transcribe chunks concurrently while decoding continues
+        transcribe_audio_chunks(chunks)
@@ -1,154 +1,549 @@
 import av
+import hashlib
+import io
+import json
+import math
+import numpy as np
+import re
 import wave
 import os
 import openai
-import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to estimate_tokens()
+    tiktoken = None
 
 # Set your OpenAI API key
 openai.api_key = ""
 
 CHUNK_DURATION_SEC = 300  # Split audio into 5-minute chunks
+SAMPLE_RATE = 16000  # Whisper works on 16 kHz mono audio
+SAMPLE_WIDTH = 2  # 16-bit samples
+MAX_WORKERS = 4  # Chunks transcribed concurrently
+QUEUE_SIZE = 4  # Decoded chunks allowed to wait for a worker
+
+# Silence detection for chunk boundaries
+SILENCE_TOLERANCE_SEC = 15  # How far a boundary may move to land on silence
+SILENCE_FRAME_LEN = 480  # 30 ms analysis frames at 16 kHz
+SILENCE_THRESHOLD_DB = -40  # Frames quieter than this (dBFS) count as silence
+MIN_SILENCE_SEC = 2  # Silent spans at least this long are cut when skipping silence
+SKIP_SILENCE = False  # Cut long silences out of chunks to save billable audio
+
+# GPT note formatting
+GPT_MODEL = "gpt-4"
 GPT_MAX_TOKENS = 3000  # Ensure each chunk sent to GPT-4 stays within token limits
+GPT_CHUNK_OVERLAP = 100  # Tokens of context repeated at the start of the next chunk
+GPT_MAX_WORKERS = 4  # Chunks formatted concurrently
+GPT_REQUESTS_PER_MINUTE = 60  # Account rate limits for GPT_MODEL
+GPT_TOKENS_PER_MINUTE = 40000
+GPT_MAX_RETRIES = 5  # Retries with exponential backoff on transient API errors
+NOTES_CACHE_DIR = "notes_cache"  # Formatted chunks, keyed by a hash of model, prompt and chunk
+
+
+def make_wav_buffer(pcm, name):
+    """
+    Wraps raw 16-bit mono PCM in an in-memory WAV file.
+
+    :param pcm: Raw PCM bytes.
+    :param name: File name reported to the API, used to detect the format.
+    :return: BytesIO positioned at the start of the WAV data.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(SAMPLE_WIDTH)  # 16-bit
+        wav_file.setframerate(SAMPLE_RATE)  # 16 kHz
+        wav_file.writeframes(pcm)
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+def frame_energies(samples, frame_len=SILENCE_FRAME_LEN):
+    """
+    Computes the RMS level of every full analysis frame in one vectorized pass.
+
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param frame_len: Samples per analysis frame.
+    :return: Array of frame levels in dBFS.
+    """
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-9) / 32768)
+
+
+def find_split_point(samples, target, tolerance, frame_len=SILENCE_FRAME_LEN,
+                     threshold_db=SILENCE_THRESHOLD_DB):
+    """
+    Picks the chunk boundary closest to ``target`` that falls on silence.
+
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param target: Preferred boundary, in samples.
+    :param tolerance: How far the boundary may move either way, in samples.
+    :param frame_len: Samples per analysis frame.
+    :param threshold_db: Frames quieter than this count as silence.
+    :return: Boundary in samples. Falls back to the quietest frame in the
+             window when it holds no silence.
+    """
+    start = max(target - tolerance, 0)
+    energies = frame_energies(samples[start:target + tolerance], frame_len)
+    if not len(energies):
+        return target
+    centers = start + np.arange(len(energies)) * frame_len + frame_len // 2
+    silent = np.flatnonzero(energies < threshold_db)
+    if len(silent):
+        best = silent[np.argmin(np.abs(centers[silent] - target))]
+    else:
+        best = np.argmin(energies)
+    return int(centers[best])
+
 
+def drop_silence(samples, frame_len=SILENCE_FRAME_LEN, threshold_db=SILENCE_THRESHOLD_DB,
+                 min_silence_sec=MIN_SILENCE_SEC):
+    """
+    Removes silent spans of at least ``min_silence_sec``, keeping shorter pauses.
 
-def extract_audio_from_mp4(mp4_file, output_wav="output.wav"):
+    :param samples: 1-D int16 NumPy array of PCM samples.
+    :param frame_len: Samples per analysis frame.
+    :param threshold_db: Frames quieter than this count as silence.
+    :param min_silence_sec: Shortest silent span that is removed.
+    :return: int16 NumPy array with the long silent spans cut out.
     """
-    Extracts audio from an MP4 file and saves it as a WAV file using PyAV.
+    silent = frame_energies(samples, frame_len) < threshold_db
+    # Run-length encode the silent frames and mark the runs that are long enough
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    long_runs = (ends - starts) * frame_len >= min_silence_sec * SAMPLE_RATE
+    marks = np.zeros(len(silent) + 1, dtype=np.int32)
+    np.add.at(marks, starts[long_runs], 1)
+    np.add.at(marks, ends[long_runs], -1)
+    drop = np.cumsum(marks[:-1]) > 0
+
+    keep = np.ones(len(samples), dtype=bool)
+    keep[:len(drop) * frame_len] = np.repeat(~drop, frame_len)
+    if len(drop) and drop[-1]:
+        keep[len(drop) * frame_len:] = False  # Partial frame at the end of a dropped span
+    return samples[keep]
+
+
+def extract_audio_chunks(mp4_file, chunk_duration_sec=CHUNK_DURATION_SEC,
+                         tolerance_sec=SILENCE_TOLERANCE_SEC, skip_silence=SKIP_SILENCE):
+    """
+    Decodes the audio of an MP4 file with PyAV and yields in-memory WAV chunks
+    of roughly ``chunk_duration_sec``, without writing the audio to disk.
+
+    Each boundary is moved to the nearest silence within ``tolerance_sec`` of the
+    nominal cut so words are not split between chunks.
 
     :param mp4_file: Path to the MP4 video file.
-    :param output_wav: Path to save the extracted WAV file.
+    :param chunk_duration_sec: Nominal duration of each chunk in seconds.
+    :param tolerance_sec: How far a boundary may move to land on silence.
+    :param skip_silence: Cut long silent spans out of the chunks and skip
+                         chunks that are entirely silent.
+    :return: Generator of WAV buffers (BytesIO) in playback order.
     """
-    try:
-        container = av.open(mp4_file)
-        audio_stream = next(s for s in container.streams if s.type == "audio")
-        resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    chunk_samples = int(chunk_duration_sec * SAMPLE_RATE)
+    tolerance = min(int(tolerance_sec * SAMPLE_RATE), chunk_samples // 2)
+    pcm = bytearray()
+    index = 0
+    total_samples = kept_samples = 0
+
+    def make_chunk(chunk_pcm):
+        nonlocal index, total_samples, kept_samples
+        samples = np.frombuffer(chunk_pcm, dtype=np.int16)
+        total_samples += len(samples)
+        if skip_silence:
+            samples = drop_silence(samples)
+            if not len(samples):
+                return None
+        kept_samples += len(samples)
+        index += 1
+        return make_wav_buffer(samples.tobytes(), f"chunk_{index}.wav")
 
-        with wave.open(output_wav, "wb") as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(16000)  # 16 kHz
+    try:
+        with av.open(mp4_file) as container:
+            audio_stream = next(s for s in container.streams if s.type == "audio")
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
 
             for frame in container.decode(audio_stream):
-                resampled_frames = resampler.resample(frame)
-                for resampled_frame in resampled_frames:
-                    wav_file.writeframes(resampled_frame.to_ndarray().tobytes())
-
-        print(f"Audio extracted and saved to: {output_wav}")
-        return output_wav
+                for resampled_frame in resampler.resample(frame):
+                    pcm += resampled_frame.to_ndarray().tobytes()
+                    # Wait for the full tolerance window past the nominal cut
+                    while len(pcm) >= (chunk_samples + tolerance) * SAMPLE_WIDTH:
+                        split = find_split_point(np.frombuffer(pcm, dtype=np.int16), chunk_samples, tolerance)
+                        chunk = make_chunk(bytes(pcm[:split * SAMPLE_WIDTH]))
+                        del pcm[:split * SAMPLE_WIDTH]
+                        if chunk is not None:
+                            yield chunk
+
+            # Flush samples still buffered in the resampler
+            for resampled_frame in resampler.resample(None):
+                pcm += resampled_frame.to_ndarray().tobytes()
+
+        if pcm:
+            chunk = make_chunk(bytes(pcm))
+            if chunk is not None:
+                yield chunk
+        skipped_sec = (total_samples - kept_samples) / SAMPLE_RATE
+        print(f"Audio extracted into {index} chunks ({skipped_sec:.1f}s of silence skipped)")
     except Exception as e:
         print(f"Error extracting audio: {e}")
         raise
 
 
-def split_audio(wav_file, chunk_duration_sec=CHUNK_DURATION_SEC):
+def transcribe_chunk(audio):
     """
-    Splits a WAV file into smaller chunks.
+    Transcribes a single WAV chunk using OpenAI Whisper.
 
-    :param wav_file: Path to the WAV file.
-    :param chunk_duration_sec: Duration of each chunk in seconds.
-    :return: List of chunk file paths.
+    :param audio: File-like WAV object with a ``name`` attribute.
+    :return: Transcribed text.
     """
-    chunk_files = []
-    try:
-        with wave.open(wav_file, "rb") as wf:
-            n_channels = wf.getnchannels()
-            sampwidth = wf.getsampwidth()
-            framerate = wf.getframerate()
-            n_frames = wf.getnframes()
-            total_duration_sec = n_frames / framerate
-
-            chunk_frames = int(chunk_duration_sec * framerate)
-
-            for i in range(math.ceil(total_duration_sec / chunk_duration_sec)):
-                chunk_file = f"chunk_{i + 1}.wav"
-                with wave.open(chunk_file, "wb") as chunk_wf:
-                    chunk_wf.setnchannels(n_channels)
-                    chunk_wf.setsampwidth(sampwidth)
-                    chunk_wf.setframerate(framerate)
-                    chunk_wf.writeframes(wf.readframes(chunk_frames))
-                chunk_files.append(chunk_file)
-                print(f"Chunk {i + 1} saved: {chunk_file}")
-        return chunk_files
-    except Exception as e:
-        print(f"Error splitting audio: {e}")
-        raise
+    response = openai.Audio.transcribe("whisper-1", audio)
+    return response.get("text", "")
+
 
+def stub_transcribe(audio):
+    """
+    Offline stand-in for transcribe_chunk, for tests and dry runs.
 
-def transcribe_audio_chunks(chunk_files, output_file="transcription.txt"):
+    :param audio: File-like WAV object with a ``name`` attribute.
+    :return: Placeholder text describing the chunk.
     """
-    Transcribes a list of audio chunks using OpenAI Whisper and saves the transcription.
+    with wave.open(audio, "rb") as wf:
+        duration_sec = wf.getnframes() / wf.getframerate()
+    return f"[{audio.name}: {duration_sec:.1f}s of audio]"
 
-    :param chunk_files: List of WAV chunk file paths.
+
+def transcribe_audio_chunks(chunks, output_file="transcription.txt", transcribe=transcribe_chunk,
+                            max_workers=MAX_WORKERS, queue_size=QUEUE_SIZE):
+    """
+    Transcribes audio chunks as they are produced and saves the transcription in order.
+
+    The calling thread pulls chunks from ``chunks`` (e.g. the decoder) and puts them on
+    a bounded queue that worker threads consume, so transcription of the first chunk
+    starts while later chunks are still being decoded. The decoder blocks whenever the
+    queue is full, which keeps memory flat regardless of recording length.
+
+    :param chunks: Iterable of WAV buffers in playback order.
     :param output_file: Path to save the transcription text.
+    :param transcribe: Function turning one chunk into text.
+    :param max_workers: Maximum number of chunks transcribed at once.
+    :param queue_size: Maximum number of decoded chunks waiting for a worker.
+    :return: List of chunk transcriptions in playback order.
     """
+    work = queue.Queue(maxsize=queue_size)
+    texts = {}
+    errors = []
+    failed = threading.Event()
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            i, chunk = item
+            if failed.is_set():
+                continue  # Drain the queue without doing more work
+            try:
+                print(f"Transcribing chunk {i + 1}...")
+                texts[i] = transcribe(chunk)
+            except Exception as e:
+                errors.append(e)
+                failed.set()
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for thread in workers:
+        thread.start()
+
     try:
+        try:
+            for item in enumerate(chunks):
+                if failed.is_set():
+                    break
+                work.put(item)  # Blocks while the queue is full
+        except Exception:
+            failed.set()
+            raise
+        finally:
+            for _ in workers:
+                work.put(None)
+            for thread in workers:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+
+        ordered = [texts[i] for i in sorted(texts)]
         with open(output_file, "w") as transcript_file:
-            for i, chunk in enumerate(chunk_files):
-                print(f"Transcribing chunk {i + 1}...")
-                with open(chunk, "rb") as audio:
-                    response = openai.Audio.transcribe("whisper-1", audio)
-                transcript_file.write(response.get("text", "") + "\n")
+            for text in ordered:
+                transcript_file.write(text + "\n")
         print(f"Transcription saved to: {output_file}")
+        return ordered
     except Exception as e:
         print(f"Error during transcription: {e}")
         raise
 
 
-def split_text(text, max_tokens=GPT_MAX_TOKENS):
+def estimate_tokens(text):
+    """
+    Offline token estimate (about 4 characters per token for English text),
+    used when tiktoken or its encoding files are unavailable.
+
+    :param text: The text to measure.
+    :return: Estimated number of tokens.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def get_token_counter(model=GPT_MODEL):
+    """
+    Returns a function that counts tokens the way ``model`` does, falling back
+    to estimate_tokens when tiktoken cannot be used.
+
+    :param model: OpenAI model name.
+    :return: Function mapping text to a token count.
     """
-    Splits a large text into smaller chunks for GPT processing.
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+            return lambda text: len(encoding.encode(text))
+        except Exception as e:  # Unknown model or encoding files not downloadable
+            print(f"tiktoken unavailable ({e}), estimating tokens instead")
+    return estimate_tokens
+
+
+def split_word(word, max_tokens, count_tokens):
+    """
+    Cuts a single word that is over budget, such as a long URL or unspaced CJK
+    text, into the longest character windows that fit ``max_tokens``.
+
+    :param word: The word to cut.
+    :param max_tokens: Maximum tokens per window.
+    :param count_tokens: Function counting tokens.
+    :return: List of (window, token count) tuples.
+    """
+    windows = []
+    while word:
+        # Binary search the longest prefix that fits; a token is rarely longer
+        # than a few characters, which bounds the search on very long words
+        low, high = 1, min(len(word), max_tokens * 16)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(" " + word[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        windows.append((word[:low], count_tokens(" " + word[:low])))
+        word = word[low:]
+    return windows
+
+
+def split_text(text, max_tokens=GPT_MAX_TOKENS, overlap_tokens=GPT_CHUNK_OVERLAP, count_tokens=None):
+    """
+    Splits a large text into chunks that fit a token budget for GPT processing.
+
+    Sentences are packed greedily until the next one would exceed ``max_tokens``.
+    Each new chunk starts with up to ``overlap_tokens`` of trailing sentences from
+    the previous one so context is not lost at the seams. Sentences over budget
+    are split on words, and words over budget on character windows, so no
+    chunk exceeds ``max_tokens``.
 
     :param text: The input text to split.
     :param max_tokens: Maximum tokens per chunk.
+    :param overlap_tokens: Tokens of context repeated from the previous chunk.
+    :param count_tokens: Function counting tokens; defaults to get_token_counter().
     :return: List of text chunks.
     """
-    sentences = text.split(". ")
-    chunks, current_chunk = [], ""
+    count_tokens = count_tokens or get_token_counter()
+    units = []  # (text, tokens, separator joining it to the previous unit)
+    for sentence in re.split(r"(?<=[.!?])\s+|\n+", text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(" " + sentence)
+        if tokens <= max_tokens:
+            units.append((sentence, tokens, " "))
+            continue
+        # A single sentence over budget is split on words instead
+        for word in sentence.split():
+            tokens = count_tokens(" " + word)
+            if tokens <= max_tokens:
+                units.append((word, tokens, " "))
+            else:
+                windows = split_word(word, max_tokens, count_tokens)
+                units.extend((window, window_tokens, " " if i == 0 else "") for i, (window, window_tokens) in enumerate(windows))
+
+    def join(parts):
+        return "".join(separator + part for part, _, separator in parts)[len(parts[0][2]):]
+
+    chunks, current, current_tokens = [], [], 0
+    for unit, tokens, separator in units:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(join(current))
+            # Carry trailing units into the next chunk as overlap
+            overlap, overlap_total = [], 0
+            for part in reversed(current):
+                if overlap_total + part[1] > min(overlap_tokens, max_tokens - tokens):
+                    break
+                overlap.append(part)
+                overlap_total += part[1]
+            current, current_tokens = overlap[::-1], overlap_total
+        current.append((unit, tokens, separator))
+        current_tokens += tokens
+
+    if current:
+        chunks.append(join(current))
 
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) < max_tokens:
-            current_chunk += sentence + ". "
-        else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + ". "
+    return chunks
 
-    if current_chunk:
-        chunks.append(current_chunk.strip())
 
-    return chunks
+class RateLimiter:
+    """
+    Token-bucket limiter for both requests per minute and tokens per minute,
+    shared by all formatting threads.
+    """
 
+    def __init__(self, requests_per_minute=GPT_REQUESTS_PER_MINUTE, tokens_per_minute=GPT_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_allowance = requests_per_minute
+        self.token_allowance = tokens_per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """
+        Blocks until one request using ``tokens`` tokens fits in both budgets.
+
+        :param tokens: Tokens the request is expected to consume.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                elapsed_min = (now - self.updated) / 60
+                self.updated = now
+                self.request_allowance = min(self.requests_per_minute,
+                                             self.request_allowance + elapsed_min * self.requests_per_minute)
+                self.token_allowance = min(self.tokens_per_minute,
+                                           self.token_allowance + elapsed_min * self.tokens_per_minute)
+                if self.request_allowance >= 1 and self.token_allowance >= tokens:
+                    self.request_allowance -= 1
+                    self.token_allowance -= tokens
+                    return
+                wait_sec = 60 * max((1 - self.request_allowance) / self.requests_per_minute,
+                                    (tokens - self.token_allowance) / self.tokens_per_minute)
+            time.sleep(wait_sec)
+
+
+def notes_cache_path(messages, model=GPT_MODEL, temperature=0.7, cache_dir=NOTES_CACHE_DIR):
+    """
+    Returns the cache path for a chat request, keyed by a hash of everything
+    that determines its output.
+
+    :param messages: Chat messages sent to the model.
+    :param model: OpenAI model name.
+    :param temperature: Sampling temperature.
+    :param cache_dir: Directory holding cached responses.
+    :return: Path of the cache file for this request.
+    """
+    key = json.dumps({"model": model, "temperature": temperature, "messages": messages}, sort_keys=True)
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.txt")
 
-def format_notes_with_gpt(transcription_file, output_file="formatted_notes.txt"):
+
+def format_chunk(chunk, limiter, count_tokens, model=GPT_MODEL, cache_dir=NOTES_CACHE_DIR,
+                 max_retries=GPT_MAX_RETRIES):
+    """
+    Formats one transcript chunk into notes, reusing a cached result when the
+    same model, prompt and chunk have been formatted before.
+
+    :param chunk: Transcript text to format.
+    :param limiter: RateLimiter shared by all workers.
+    :param count_tokens: Function counting tokens in a text.
+    :param model: OpenAI model name.
+    :param cache_dir: Directory holding cached responses.
+    :param max_retries: Retries with exponential backoff on transient API errors.
+    :return: Tuple of (notes text, whether it came from the cache).
+    """
+    prompt = (
+        "You are a note-taking assistant. Format the following text into study notes with bullet points, headings, and subheadings:\n\n"
+        f"{chunk}"
+    )
+    messages = [
+        {"role": "system", "content": "You are a note-taking assistant."},
+        {"role": "user", "content": prompt},
+    ]
+    cache_path = notes_cache_path(messages, model=model, cache_dir=cache_dir)
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as file:
+            return file.read(), True
+
+    # Notes come out about as long as the chunk, so budget the prompt twice
+    limiter.acquire(2 * count_tokens(prompt))
+    for attempt in range(max_retries + 1):
+        try:
+            response = openai.ChatCompletion.create(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+            )
+            break
+        except (openai.error.RateLimitError, openai.error.APIError, openai.error.Timeout,
+                openai.error.ServiceUnavailableError, openai.error.APIConnectionError) as e:
+            if attempt == max_retries:
+                raise
+            delay = 2 ** attempt
+            print(f"GPT request failed ({e}), retrying in {delay}s...")
+            time.sleep(delay)
+
+    notes = response['choices'][0]['message']['content']
+    # Write to a temporary file first so an interrupted run never leaves a partial entry
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(notes)
+    os.replace(tmp_path, cache_path)
+    return notes, False
+
+
+def format_notes_with_gpt(transcription_file, output_file="formatted_notes.txt", max_workers=GPT_MAX_WORKERS):
     """
     Formats transcription text into study notes using GPT.
 
+    Chunks are formatted concurrently under the shared rate limits, and each
+    result is cached on disk so a re-run only pays for new or changed chunks.
+
     :param transcription_file: Path to the transcription text file.
     :param output_file: Path to save the formatted notes.
+    :param max_workers: Maximum number of chunks formatted at once.
     """
     try:
         with open(transcription_file, "r") as file:
             transcription_text = file.read()
 
-        chunks = split_text(transcription_text)
+        count_tokens = get_token_counter()
+        chunks = split_text(transcription_text, count_tokens=count_tokens)
+        limiter = RateLimiter()
 
-        notes = []
-        for i, chunk in enumerate(chunks):
+        def format_indexed(item):
+            i, chunk = item
             print(f"Formatting chunk {i + 1} with GPT...")
-            prompt = (
-                "You are a note-taking assistant. Format the following text into study notes with bullet points, headings, and subheadings:\n\n"
-                f"{chunk}"
-            )
+            return format_chunk(chunk, limiter, count_tokens)
 
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a note-taking assistant."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.7,
-            )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map() returns results in chunk order, whatever order they finish in
+            results = list(executor.map(format_indexed, enumerate(chunks)))
 
-            notes.append(response['choices'][0]['message']['content'])
+        notes = [text for text, _ in results]
+        cached = sum(1 for _, from_cache in results if from_cache)
+        print(f"Formatted {len(chunks)} chunks ({cached} from cache)")
 
         with open(output_file, "w") as file:
             file.write("\n\n".join(notes))
@@ -164,27 +559,12 @@ if __name__ == "__main__":
     if not os.path.exists(video_file_path):
         print("Error: File not found. Please provide a valid file path.")
     else:
-        try:
-            # Step 1: Extract audio
-            wav_file = extract_audio_from_mp4(video_file_path)
-
-            # Step 2: Split audio into chunks
-            chunk_files = split_audio(wav_file)
+        # Step 1: Decode audio into in-memory chunks (lazily, as a generator)
+        chunks = extract_audio_chunks(video_file_path)
 
-            # Step 3: Transcribe each chunk
-            transcription_file = "transcription.txt"
-            transcribe_audio_chunks(chunk_files, transcription_file)
+        # Step 2: Transcribe chunks concurrently while decoding continues
+        transcription_file = "transcription.txt"
+        transcribe_audio_chunks(chunks, transcription_file)
 
-            # Step 4: Format transcription into notes using GPT
-            format_notes_with_gpt(transcription_file)
-
-        finally:
-            # Clean up temporary files
-            if os.path.exists("output.wav"):
-                os.remove("output.wav")
-                print("Temporary audio file deleted.")
-
-            for chunk in chunk_files:
-                if os.path.exists(chunk):
-                    os.remove(chunk)
-            print("Temporary chunk files deleted.")
+        # Step 3: Format transcription into notes using GPT
+        format_notes_with_gpt(transcription_file)
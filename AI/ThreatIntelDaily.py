@@ -1,48 +1,297 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for headless scripts
 import matplotlib.pyplot as plt
 from fpdf import FPDF
 from datetime import datetime
-from collections import Counter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from pypdf import PdfReader, PdfWriter
+import io
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from apscheduler.schedulers.blocking import BlockingScheduler
+import hashlib
+import json
+import math
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from notify import get_email_dispatcher
 
 # OTX API Configuration
 API_KEY = ""
 BASE_URL = "https://otx.alienvault.com/api/v1"
+MAX_WORKERS = 8  # Concurrent requests against the OTX API
+REQUEST_TIMEOUT = 30  # Seconds
+MAX_RETRIES = 5  # Retries with exponential backoff on 429/5xx responses
+PAGE_LIMIT = 50  # Pulses requested per page when syncing
+
+# Local pulse store
+PULSE_DB = "pulses.db"
+PULSE_TABLE = "pulses.parquet"  # Normalized snapshot of the store (.parquet or .feather)
+
+# Dashboard chart cache, keyed by a hash of the aggregated chart data
+CHART_CACHE_DIR = "chart_cache"
+CHART_CACHE_KEEP = 5  # Most recently used charts kept, older ones are deleted
+
+# PDF report configuration
+PDF_LAYOUT = "pages"  # "pages" for one page per pulse, "summary" for a compact table
+PDF_BATCH_SIZE = 500  # Pulses rendered into each part file before it is flushed to disk
+PDF_WORKERS = 1  # Worker processes rendering batches; 1 renders in this process
 
 # Email Configuration
 EMAIL_USER = ""  # Sender's email address
 EMAIL_PASSWORD = ""  # Email account password or app-specific password
 RECEIVER_EMAIL = ""  # Recipient's email address
+SMTP_HOST = "smtp.gmail.com"  # Point at a local SMTP stand-in for testing
+SMTP_PORT = 587
+SMTP_STARTTLS = True
+SMTP_MAX_RETRIES = 3
 
 class PDF(FPDF):
+    def __init__(self, page_offset=0, number_pages=True):
+        super().__init__()
+        self.page_offset = page_offset  # Pages rendered in earlier parts of the report
+        self.number_pages = number_pages
+
     def header(self):
         self.set_font("Arial", "B", 12)
         self.cell(0, 10, "Threat Intelligence Dashboard", align="C", ln=True)
 
     def footer(self):
+        if not self.number_pages:
+            return
         self.set_y(-15)
         self.set_font("Arial", "I", 8)
-        self.cell(0, 10, f"Page {self.page_no()}", align="C")
+        self.cell(0, 10, f"Page {self.page_offset + self.page_no()}", align="C")
+
+class OTXClient:
+    # Shared OTX client: one pooled keep-alive session, timeouts, exponential
+    # backoff on rate limits/server errors, and per-request timing metrics.
+    def __init__(self, api_key, base_url=BASE_URL, max_workers=MAX_WORKERS,
+                 timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES):
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.metrics = []  # (url, status, seconds) per request since the last report
+        self._metrics_lock = threading.Lock()
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=1,  # 1s, 2s, 4s, ... between attempts
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({"X-OTX-API-KEY": api_key})
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, endpoint, params=None):
+        # "next" links from paginated responses are already absolute URLs
+        url = endpoint if endpoint.startswith("http") else f"{self.base_url}/{endpoint}"
+        start = time.perf_counter()
+        status = None
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            status = response.status_code
+            response.raise_for_status()
+            return response.json()
+        finally:
+            with self._metrics_lock:
+                self.metrics.append((url, status, time.perf_counter() - start))
+
+    def fetch_many(self, requests_list):
+        # Fetch (endpoint, params) pairs concurrently; results keep input order
+        # and failed requests come back as None.
+        def fetch(item):
+            endpoint, params = item
+            try:
+                return self.get(endpoint, params=params)
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching data: {e}")
+                return None
 
-def fetch_data(endpoint):
-    headers = {"X-OTX-API-KEY": API_KEY}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fetch, requests_list))
+
+    def print_metrics(self):
+        # Reports the requests made since the last report and clears them, so
+        # a long-running scheduler prints per-run numbers without growing
+        with self._metrics_lock:
+            timings = [seconds for _, _, seconds in self.metrics]
+            self.metrics = []
+        if not timings:
+            return
+        print(
+            f"OTX requests: {len(timings)}, total {sum(timings):.2f}s, "
+            f"avg {sum(timings) / len(timings):.2f}s, max {max(timings):.2f}s"
+        )
+
+otx = OTXClient(API_KEY)
+
+def fetch_data(endpoint, params=None):
     try:
-        response = requests.get(f"{BASE_URL}/{endpoint}", headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return otx.get(endpoint, params=params)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data: {e}")
         return None
 
+def fetch_all_pages(endpoint, params=None):
+    # The first page reports the total count, so the remaining pages can be
+    # requested concurrently. Falls back to following "next" links otherwise.
+    params = dict(params or {}, limit=PAGE_LIMIT)
+    first = fetch_data(endpoint, params=params)
+    if not first or "results" not in first:
+        return None
+
+    pages = [first]
+    next_url = first.get("next")
+    count = first.get("count")
+    if next_url and count:
+        page_count = math.ceil(count / PAGE_LIMIT)
+        rest = otx.fetch_many([(endpoint, dict(params, page=n)) for n in range(2, page_count + 1)])
+        if any(not page or "results" not in page for page in rest):
+            return None
+        pages.extend(rest)
+    else:
+        while next_url:
+            page = fetch_data(next_url)
+            if not page or "results" not in page:
+                return None
+            pages.append(page)
+            next_url = page.get("next")
+    return pages
+
+def open_pulse_store(db_path=PULSE_DB):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pulses (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            author_name TEXT,
+            created TEXT,
+            modified TEXT,
+            tags TEXT,
+            description TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pulses_modified ON pulses (modified)")
+    conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+    conn.commit()
+    return conn
+
+def get_state(conn, key):
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_state(conn, key, value):
+    conn.execute(
+        "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+    conn.commit()
+
+def get_sync_cursor(conn):
+    return get_state(conn, "modified_since")
+
+def set_sync_cursor(conn, cursor):
+    set_state(conn, "modified_since", cursor)
+
+def upsert_pulses(conn, pulses):
+    rows = [
+        (
+            pulse["id"],
+            pulse.get("name"),
+            pulse.get("author_name"),
+            pulse.get("created"),
+            pulse.get("modified"),
+            json.dumps(pulse.get("tags") or []),
+            pulse.get("description"),
+        )
+        for pulse in pulses
+    ]
+    conn.executemany(
+        """
+        INSERT INTO pulses (id, name, author_name, created, modified, tags, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            author_name = excluded.author_name,
+            created = excluded.created,
+            modified = excluded.modified,
+            tags = excluded.tags,
+            description = excluded.description
+        """,
+        rows,
+    )
+    if rows:
+        # Bumped in the same transaction, so a snapshot saved at an older
+        # revision is known to be missing these pulses
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+    conn.commit()
+    return len(rows)
+
+def sync_pulses(conn, endpoint="pulses/subscribed"):
+    # Fetch every page changed since the last successful cursor and upsert it.
+    # The cursor only advances once all pages have been stored, so a failed run
+    # is retried from the same point next time.
+    cursor = get_sync_cursor(conn)
+    params = {}
+    if cursor:
+        params["modified_since"] = cursor
+        print(f"Syncing pulses modified since {cursor}...")
+    else:
+        print("No previous sync found, fetching all subscribed pulses...")
+
+    pages = fetch_all_pages(endpoint, params=params)
+    otx.print_metrics()
+    if pages is None:
+        print("Sync interrupted, keeping previous cursor.")
+        return None
+
+    latest, total = cursor, 0
+    for page in pages:
+        results = page["results"]
+        total += upsert_pulses(conn, results)
+        for pulse in results:
+            if pulse.get("modified") and (latest is None or pulse["modified"] > latest):
+                latest = pulse["modified"]
+
+    if latest:
+        set_sync_cursor(conn, latest)
+    print(f"Synced {total} new or updated pulses.")
+    return total
+
+def load_pulses(conn):
+    rows = conn.execute(
+        "SELECT id, name, author_name, created, modified, tags, description "
+        "FROM pulses ORDER BY modified DESC"
+    ).fetchall()
+    columns = ["id", "name", "author_name", "created", "modified", "tags", "description"]
+    pulses = [dict(zip(columns, row)) for row in rows]
+    for pulse in pulses:
+        pulse["tags"] = json.loads(pulse["tags"]) if pulse["tags"] else []
+    return pulses
+
 def generate_table(data):
     df = pd.DataFrame(data)
     if df.empty:
@@ -53,43 +302,129 @@ def generate_table(data):
     columns_to_keep = ["id", "name", "author_name", "created", "modified", "tags", "description"]
     if "description" not in df.columns:
         df["description"] = "No description available"  # Placeholder if missing
-    df = df[columns_to_keep]
-    df["created"] = pd.to_datetime(df["created"]).dt.strftime("%Y-%m-%d %H:%M:%S")
-    df["modified"] = pd.to_datetime(df["modified"]).dt.strftime("%Y-%m-%d %H:%M:%S")
+    df = df[columns_to_keep].copy()
+    df["description"] = df["description"].fillna("No description available")
+    # Datetimes stay native and authors categorical so the analytics below
+    # run as vectorized groupbys; formatting happens only when rendering.
+    df["created"] = pd.to_datetime(df["created"], format="ISO8601")
+    df["modified"] = pd.to_datetime(df["modified"], format="ISO8601")
+    df["author_name"] = df["author_name"].astype("category")
+    return df
+
+def explode_tags(df):
+    # One row per (pulse, tag) with the tag stored as a categorical
+    tags = df[["id", "modified", "tags"]].explode("tags").dropna(subset=["tags"])
+    return tags.rename(columns={"tags": "tag"}).astype({"tag": "category"})
+
+def author_frequencies(df, top_n=None):
+    counts = df["author_name"].value_counts()
+    counts = counts[counts > 0]
+    return counts.head(top_n) if top_n else counts
+
+def tag_frequencies(df, top_n=None):
+    counts = explode_tags(df)["tag"].value_counts()
+    counts = counts[counts > 0]
+    return counts.head(top_n) if top_n else counts
+
+def pulse_trend(df, freq="W", column="modified"):
+    # Pulses per time bucket, e.g. freq="D" for daily or "W" for weekly counts
+    return df.groupby(pd.Grouper(key=column, freq=freq)).size()
+
+def tag_trend(df, freq="W", top_n=5):
+    # Time-bucketed counts for the top-N tags, one column per tag
+    tags = explode_tags(df)
+    top_tags = tags["tag"].value_counts().head(top_n).index
+    tags = tags[tags["tag"].isin(top_tags)].copy()
+    tags["tag"] = tags["tag"].cat.remove_unused_categories()
+    return tags.groupby([pd.Grouper(key="modified", freq=freq), "tag"], observed=True).size().unstack(fill_value=0)
+
+def save_table(df, path=PULSE_TABLE):
+    try:
+        if path.endswith(".feather"):
+            df.reset_index(drop=True).to_feather(path)
+        else:
+            df.to_parquet(path, index=False)
+        print(f"Pulse table saved as {path}")
+        return True
+    except ImportError as e:
+        print(f"Skipping pulse table snapshot: {e}")
+        return False
+
+def load_table(path=PULSE_TABLE):
+    df = pd.read_feather(path) if path.endswith(".feather") else pd.read_parquet(path)
+    # List columns come back as arrays; the report expects plain lists
+    df["tags"] = df["tags"].map(list)
     return df
 
-def generate_bar_chart(df, column, output_image):
-    chart_data = df[column].value_counts()
-    plt.figure(figsize=(10, 6))
-    chart_data.plot(kind="bar", color="skyblue", edgecolor="black")
-    plt.title(f"Frequency of {column.capitalize()}", fontsize=16)
-    plt.xlabel(column.capitalize(), fontsize=14)
-    plt.ylabel("Count", fontsize=14)
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.savefig(output_image)
-    plt.close()
-    print(f"Bar chart saved as {output_image}")
-
-def generate_pie_chart(df, column, output_image):
-    tags_list = df[column].explode().dropna().tolist()
-    tag_counts = Counter(tags_list).most_common(5)
-    labels, sizes = zip(*tag_counts)
-
-    plt.figure(figsize=(8, 8))
-    plt.pie(
-        sizes,
-        labels=labels,
+def plot_author_bar(ax, author_counts):
+    author_counts.plot(kind="bar", ax=ax, color="skyblue", edgecolor="black")
+    ax.set_title("1. Frequency of Authors", fontsize=16)
+    ax.set_xlabel("Author", fontsize=14)
+    ax.set_ylabel("Count", fontsize=14)
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+
+def plot_tag_pie(ax, tag_counts):
+    ax.pie(
+        tag_counts.values,
+        labels=tag_counts.index.tolist(),
         autopct="%1.1f%%",
         startangle=140,
         colors=["#66b3ff", "#99ff99", "#ffcc99", "#ff9999", "#c2c2f0"],
         textprops={"fontsize": 10},
     )
-    plt.title(f"Top 5 Most Common Tags", fontsize=16)
-    plt.tight_layout()
-    plt.savefig(output_image)
-    plt.close()
-    print(f"Pie chart saved as {output_image}")
+    ax.set_title("2. Top 5 Most Common Tags", fontsize=16)
+
+def generate_dashboard_chart(df, cache_dir=CHART_CACHE_DIR):
+    # Render every dashboard panel in a single figure and return the PNG bytes.
+    # The image is cached under a hash of the aggregated counts, so unchanged
+    # data skips matplotlib entirely.
+    author_counts = author_frequencies(df)
+    tag_counts = tag_frequencies(df, top_n=5)
+    chart_data = {
+        "authors": [[str(k), int(v)] for k, v in author_counts.items()],
+        "tags": [[str(k), int(v)] for k, v in tag_counts.items()],
+    }
+    digest = hashlib.sha256(json.dumps(chart_data, sort_keys=True).encode()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"dashboard_{digest}.png")
+    if os.path.exists(cache_path):
+        print(f"Dashboard chart unchanged, using cached {cache_path}")
+        os.utime(cache_path)  # Mark as recently used for pruning
+        with open(cache_path, "rb") as f:
+            return f.read()
+
+    fig, (bar_ax, pie_ax) = plt.subplots(2, 1, figsize=(10, 14))
+    plot_author_bar(bar_ax, author_counts)
+    plot_tag_pie(pie_ax, tag_counts)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    image = buffer.getvalue()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        f.write(image)
+    print(f"Dashboard chart rendered and cached as {cache_path}")
+    prune_chart_cache(cache_dir)
+    return image
+
+def prune_chart_cache(cache_dir=CHART_CACHE_DIR, keep=CHART_CACHE_KEEP):
+    # Each data change adds a chart, so only the most recently used are kept
+    charts = [
+        entry for entry in os.scandir(cache_dir)
+        if entry.name.startswith("dashboard_") and entry.name.endswith(".png")
+    ]
+    charts.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in charts[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            print(f"Could not remove old chart {entry.path}: {e}")
+
+def format_timestamp(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if pd.notna(value) else "Unknown"
 
 def add_pulse_to_pdf(pdf, pulse):
     pdf.add_page()
@@ -99,8 +434,8 @@ def add_pulse_to_pdf(pdf, pulse):
     pdf.set_font("Arial", "", 12)
     pdf.cell(0, 10, f"Name: {pulse['name']}", ln=True)
     pdf.cell(0, 10, f"Author: {pulse['author_name']}", ln=True)
-    pdf.cell(0, 10, f"Created: {pulse['created']}", ln=True)
-    pdf.cell(0, 10, f"Modified: {pulse['modified']}", ln=True)
+    pdf.cell(0, 10, f"Created: {format_timestamp(pulse['created'])}", ln=True)
+    pdf.cell(0, 10, f"Modified: {format_timestamp(pulse['modified'])}", ln=True)
     pdf.cell(0, 10, "Tags:", ln=True)
     pdf.set_font("Arial", "I", 10)
     pdf.multi_cell(0, 10, ", ".join(pulse['tags']) if pulse['tags'] else "No tags available")
@@ -109,8 +444,47 @@ def add_pulse_to_pdf(pdf, pulse):
     pdf.set_font("Arial", "I", 10)
     pdf.multi_cell(0, 10, pulse['description'] if pulse['description'] else "No description available")
 
-def generate_pdf_report(dataframe, bar_chart, pie_chart, output_pdf):
-    pdf = PDF()
+def iter_pulses(dataframe):
+    for row in dataframe.itertuples(index=False):
+        yield row._asdict()
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def fit_text(pdf, text, width):
+    # Truncate text so it fits on a single table cell line
+    text = str(text) if text else ""
+    if pdf.get_string_width(text) <= width:
+        return text
+    while text and pdf.get_string_width(text + "...") > width:
+        text = text[:-1]
+    return text + "..."
+
+SUMMARY_COLUMNS = [("Name", 80), ("Author", 35), ("Modified", 35), ("Tags", 40)]
+
+def add_summary_table_header(pdf):
+    pdf.set_font("Arial", "B", 10)
+    for title, width in SUMMARY_COLUMNS:
+        pdf.cell(width, 8, title, border=1)
+    pdf.ln()
+    pdf.set_font("Arial", "", 8)
+
+def add_summary_table(pdf, pulses):
+    pdf.add_page()
+    add_summary_table_header(pdf)
+    for pulse in pulses:
+        if pdf.get_y() + 6 > pdf.page_break_trigger:
+            pdf.add_page()
+            add_summary_table_header(pdf)
+        values = [pulse["name"], pulse["author_name"], format_timestamp(pulse["modified"]), ", ".join(pulse["tags"] or [])]
+        for (_, width), value in zip(SUMMARY_COLUMNS, values):
+            pdf.cell(width, 6, fit_text(pdf, value, width - 2), border=1)
+        pdf.ln()
+
+def render_front_matter(dashboard_chart, output_path, number_pages=True):
+    pdf = PDF(number_pages=number_pages)
     pdf.set_auto_page_break(auto=True, margin=15)
 
     # Title Page
@@ -121,23 +495,90 @@ def generate_pdf_report(dataframe, bar_chart, pie_chart, output_pdf):
     pdf.cell(200, 10, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align="C")
     pdf.ln(20)
 
-    # Add Bar Chart Section
+    # Add Dashboard Section. PyFPDF 1.7 only reads images from a path, so the
+    # chart is written next to the part file, in the report's temp directory
+    chart_path = os.path.splitext(output_path)[0] + "_dashboard.png"
+    with open(chart_path, "wb") as f:
+        f.write(dashboard_chart)
     pdf.add_page()
     pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "1. Bar Chart - Frequency of Authors", ln=True)
-    pdf.image(bar_chart, x=10, y=30, w=180)
+    pdf.cell(0, 10, "Dashboard - Frequency of Authors and Distribution of Tags", ln=True)
+    pdf.image(chart_path, x=20, y=30, h=240)
 
-    # Add Pie Chart Section
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "2. Pie Chart - Distribution of Tags", ln=True)
-    pdf.image(pie_chart, x=10, y=30, w=180)
+    pdf.output(output_path)
+    return pdf.page_no()
+
+def render_pulse_batch(pulses, output_path, layout=PDF_LAYOUT, page_offset=0, number_pages=True):
+    pdf = PDF(page_offset=page_offset, number_pages=number_pages)
+    pdf.set_auto_page_break(auto=True, margin=15)
+    if layout == "summary":
+        add_summary_table(pdf, pulses)
+    else:
+        for pulse in pulses:
+            add_pulse_to_pdf(pdf, pulse)
+    pdf.output(output_path)
+    return pdf.page_no()
+
+def pdf_bytes(pdf):
+    # PyFPDF 1.7 returns the document as a latin-1 str, fpdf2 as a bytearray
+    data = pdf.output(dest="S")
+    return data.encode("latin1") if isinstance(data, str) else bytes(data)
 
-    # Add Individual Pulse Pages
-    for _, pulse in dataframe.iterrows():
-        add_pulse_to_pdf(pdf, pulse)
+def stamp_page_numbers(writer, batch_size=PDF_BATCH_SIZE):
+    # Parts rendered in parallel cannot know their page offset, so the footer
+    # page numbers are overlaid once the merged page count is known. Overlays
+    # are rendered batch_size pages at a time rather than as one document.
+    pages = writer.pages
+    for first in range(0, len(pages), batch_size):
+        overlay = FPDF()
+        overlay.set_auto_page_break(auto=False)
+        for page_number in range(first + 1, min(first + batch_size, len(pages)) + 1):
+            overlay.add_page()
+            overlay.set_y(-15)
+            overlay.set_font("Arial", "I", 8)
+            overlay.cell(0, 10, f"Page {page_number}", align="C")
+        for offset, overlay_page in enumerate(PdfReader(io.BytesIO(pdf_bytes(overlay))).pages):
+            pages[first + offset].merge_page(overlay_page)
 
-    pdf.output(output_pdf)
+def merge_pdf_parts(part_paths, output_pdf, number_pages=False):
+    # pypdf keeps every appended page in the writer until it is written, so
+    # this step is O(total pages) in memory, unlike the batched rendering
+    writer = PdfWriter()
+    for path in part_paths:
+        writer.append(path)
+    if number_pages:
+        stamp_page_numbers(writer)
+    writer.write(output_pdf)
+
+def generate_pdf_report(dataframe, dashboard_chart, output_pdf, layout=PDF_LAYOUT,
+                        batch_size=PDF_BATCH_SIZE, workers=PDF_WORKERS):
+    # Pulses are streamed in fixed-size batches, each rendered into its own
+    # part file, so FPDF only ever holds one batch in memory. The parts are
+    # merged into the final report at the end; the merge itself still holds
+    # the whole document (see merge_pdf_parts).
+    parallel = workers > 1
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, "part_0000.pdf")]
+        page_count = render_front_matter(dashboard_chart, part_paths[0], number_pages=not parallel)
+        batches = enumerate(batched(iter_pulses(dataframe), batch_size), start=1)
+
+        if not parallel:
+            for index, batch in batches:
+                part_paths.append(os.path.join(tmp_dir, f"part_{index:04d}.pdf"))
+                page_count += render_pulse_batch(batch, part_paths[-1], layout, page_offset=page_count)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Bound the batches in flight so pulses are not all queued at once
+                pending = deque()
+                for index, batch in batches:
+                    part_paths.append(os.path.join(tmp_dir, f"part_{index:04d}.pdf"))
+                    pending.append(executor.submit(render_pulse_batch, batch, part_paths[-1], layout, 0, False))
+                    if len(pending) >= workers * 2:
+                        pending.popleft().result()
+                for future in pending:
+                    future.result()
+
+        merge_pdf_parts(part_paths, output_pdf, number_pages=parallel)
     print(f"PDF report saved as {output_pdf}")
 
 def send_email_with_attachment(subject, body, to_email, attachment_path):
@@ -160,39 +601,41 @@ def send_email_with_attachment(subject, body, to_email, attachment_path):
             )
             msg.attach(part)
 
-        print("Connecting to the SMTP server...")
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            print("Logging into the SMTP server...")
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            print(f"Logged in successfully. Sending email to {to_email}...")
-            server.send_message(msg)
-            print(f"Email sent successfully to {to_email}")
+        print(f"Sending email to {to_email}...")
+        email_dispatcher = get_email_dispatcher(SMTP_HOST, SMTP_PORT, SMTP_STARTTLS, EMAIL_USER, EMAIL_PASSWORD,
+                                                max_retries=SMTP_MAX_RETRIES)
+        email_dispatcher.send(msg).result()
+        print(f"Email sent successfully to {to_email}")
+        email_dispatcher.print_metrics()
     except Exception as e:
         print(f"Failed to send email: {e}")
 
 def main():
-    print("Fetching threat pulses...")
-    pulses = fetch_data("pulses/subscribed")
-
-    if not pulses or "results" not in pulses:
-        print("No data available from the API.")
-        return
-
-    data = pulses["results"]
-
-    df = generate_table(data)
-    if df is None:
-        return
-
-    bar_chart_file = "author_frequency_chart.png"
-    generate_bar_chart(df, "author_name", bar_chart_file)
+    print("Syncing threat pulses...")
+    conn = open_pulse_store()
+    try:
+        sync_pulses(conn)
+        revision = get_state(conn, "revision")
+        if revision is not None and revision == get_state(conn, "snapshot_revision") and os.path.exists(PULSE_TABLE):
+            # The snapshot was saved from this exact store state, skip re-parsing it
+            df = load_table(PULSE_TABLE)
+        else:
+            data = load_pulses(conn)
+            if not data:
+                print("No data available in the local pulse store.")
+                return
+            df = generate_table(data)
+            if df is None:
+                return
+            if save_table(df, PULSE_TABLE):
+                set_state(conn, "snapshot_revision", revision)
+    finally:
+        conn.close()
 
-    pie_chart_file = "tags_distribution_chart.png"
-    generate_pie_chart(df, "tags", pie_chart_file)
+    dashboard_chart = generate_dashboard_chart(df)
 
     pdf_file = "individual_pulse_pages_report.pdf"
-    generate_pdf_report(df, bar_chart_file, pie_chart_file, pdf_file)
+    generate_pdf_report(df, dashboard_chart, pdf_file)
 
     # Email the report
     send_email_with_attachment(
@@ -1,19 +1,57 @@
-from flask import Flask, render_template_string, request
+from flask import Flask, Response, jsonify, render_template_string, request, stream_with_context
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qs, urlparse
+import av
+import io
+import itertools
+import json
 import openai
 import yt_dlp
 import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import uuid
+import wave
 
 # Configure OpenAI API Key
 openai.api_key = ''
 
+MAX_JOBS = 4  # Videos processed concurrently in the background
+JOB_TTL_SEC = 3600  # Finished jobs can be polled for this long before they are pruned
+SUMMARY_CACHE_SIZE = 256  # Least recently used summaries are evicted past this
+SUMMARY_CACHE_TTL_SEC = 24 * 3600  # Seconds a finished summary is served from the cache
+REFRESH_SEC = 5  # Reload interval of the result page for clients without JavaScript
+YOUTUBE_HOSTS = {'youtu.be', 'youtube.com'}  # Plus any subdomain of youtube.com
+VIDEO_ID_PATTERN = re.compile(r'^[\w-]{11}$', re.ASCII)
+
+# Map-reduce summarization of long videos
+SEGMENT_DURATION_SEC = 600  # Audio segment transcribed and summarized as one map task
+SAMPLE_RATE = 16000  # Segments are sent to Whisper as 16 kHz mono WAV
+MAP_WORKERS = 4  # Segments processed concurrently within one job
+REDUCE_FAN_IN = 8  # Partial summaries combined per reduce call
+
 app = Flask(__name__)
 
+# Background jobs and finished summaries, keyed by job ID and YouTube video ID
+executor = ThreadPoolExecutor(max_workers=MAX_JOBS)
+jobs = {}
+job_listeners = {}  # Job ID -> callbacks receiving its progress events
+summary_cache = OrderedDict()  # Video ID -> (summary, expires_at)
+jobs_lock = threading.Lock()
+
 # HTML template with tech-themed styling
 html_template = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
+    {% if job_id %}
+        <noscript><meta http-equiv="refresh" content="{{ refresh_sec }};url=/result/{{ job_id }}"></noscript>
+    {% endif %}
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>YouTube Video Summarizer</title>
     <style>
@@ -70,7 +108,7 @@ html_template = """
 <body>
     <h1>YouTube Video Summarizer</h1>
     <div class="container">
-        <form action="/summarize" method="post">
+        <form action="/summarize" method="post" id="summarize-form">
             <input type="text" name="video_url" placeholder="Enter YouTube Video URL" required>
             <br>
             <input type="submit" value="Summarize Video">
@@ -80,8 +118,82 @@ html_template = """
                 <h2>Summary:</h2>
                 <p>{{ summary }}</p>
             </div>
+        {% elif error %}
+            <div class="result">
+                <h2>Summary:</h2>
+                <p>Error: {{ error }}</p>
+            </div>
+        {% elif job_id %}
+            <div class="result" id="result">
+                <h2>Summary:</h2>
+                <p id="status">Working on it...</p>
+            </div>
+            <script>
+                // Poll the job until the background worker has finished
+                function poll() {
+                    fetch("/status/{{ job_id }}")
+                        .then(response => response.json())
+                        .then(job => {
+                            const status = document.getElementById("status");
+                            if (job.status === "done") {
+                                status.textContent = job.summary;
+                            } else if (job.status === "error") {
+                                status.textContent = "Error: " + job.error;
+                            } else {
+                                status.textContent = "Working on it... (" + job.status + ")";
+                                setTimeout(poll, 2000);
+                            }
+                        });
+                }
+                poll();
+            </script>
         {% endif %}
+        <div class="result" id="stream-result" style="display: none;">
+            <h2>Summary:</h2>
+            <p id="stream-status"></p>
+            <p id="stream-summary"></p>
+        </div>
     </div>
+    <script>
+        // Stream progress and summary tokens over server-sent events instead of
+        // waiting for the whole pipeline; the plain form post still works without JS
+        document.getElementById("summarize-form").addEventListener("submit", event => {
+            event.preventDefault();
+            const url = event.target.video_url.value;
+            const status = document.getElementById("stream-status");
+            const summary = document.getElementById("stream-summary");
+            document.getElementById("stream-result").style.display = "block";
+            status.textContent = "Starting...";
+            summary.textContent = "";
+
+            const source = new EventSource("/stream?video_url=" + encodeURIComponent(url));
+            source.onmessage = message => {
+                const data = JSON.parse(message.data);
+                if (data.type === "status") {
+                    status.textContent = data.status === "queued" ? "Waiting for a free worker..." : "Working on it...";
+                } else if (data.type === "download") {
+                    status.textContent = "Downloading audio... " + data.percent.toFixed(0) + "%";
+                } else if (data.type === "transcribe") {
+                    status.textContent = "Transcribed segment " + data.segment + "...";
+                } else if (data.type === "summarize") {
+                    status.textContent = "Summarized segment " + data.segment + "...";
+                } else if (data.type === "reduce") {
+                    status.textContent = "Combining " + data.parts + " partial summaries...";
+                } else if (data.type === "token") {
+                    status.textContent = "Writing summary...";
+                    summary.textContent += data.text;
+                } else if (data.type === "done") {
+                    status.textContent = "";
+                    summary.textContent = data.summary;
+                    source.close();
+                } else if (data.type === "error") {
+                    status.textContent = "Error: " + data.error;
+                    source.close();
+                }
+            };
+            source.onerror = () => source.close();
+        });
+    </script>
 </body>
 </html>
 """
@@ -92,48 +204,356 @@ def index():
 
 @app.route('/summarize', methods=['POST'])
 def summarize():
-    video_url = request.form.get('video_url')
-    
-    # Download audio from YouTube
-    audio_file = download_audio(video_url)
-    
-    # Transcribe audio
-    transcript = transcribe_audio(audio_file)
-    
-    # Summarize transcription
-    summary = summarize_text(transcript)
-    
-    # Clean up downloaded file
-    os.remove(audio_file)
-    
-    return render_template_string(html_template, summary=summary)
-
-def download_audio(video_url):
+    video_url = request.form.get('video_url', '').strip()
+    try:
+        video_id = extract_video_id(video_url)
+    except ValueError as e:
+        return render_template_string(html_template, error=str(e)), 400
+
+    # Popular videos are answered straight from the cache
+    summary = get_cached_summary(video_id)
+    if summary is not None:
+        return render_template_string(html_template, summary=summary)
+
+    job_id = submit_job(video_url, video_id)
+    return render_template_string(html_template, job_id=job_id, refresh_sec=REFRESH_SEC)
+
+@app.route('/result/<job_id>')
+def result(job_id):
+    # The job's page, reloaded by clients without JavaScript until it finishes
+    with jobs_lock:
+        job = dict(jobs.get(job_id) or {})
+    if not job:
+        return render_template_string(html_template, error='Unknown job ID'), 404
+    if job['status'] == 'done':
+        return render_template_string(html_template, summary=job['summary'])
+    if job['status'] == 'error':
+        return render_template_string(html_template, error=job['error'])
+    return render_template_string(html_template, job_id=job_id, refresh_sec=REFRESH_SEC)
+
+@app.route('/stream')
+def stream():
+    # Server-sent events: the job's status as soon as the stream is attached,
+    # download progress, per-segment progress, then the summary tokens as the
+    # model produces them
+    video_url = request.args.get('video_url')
+
+    def events():
+        if not video_url:
+            yield sse_event({'type': 'error', 'error': 'Missing video_url'})
+            return
+        try:
+            video_id = extract_video_id(video_url)
+        except ValueError as e:
+            yield sse_event({'type': 'error', 'error': str(e)})
+            return
+        summary = get_cached_summary(video_id)
+        if summary is not None:
+            yield sse_event({'type': 'done', 'summary': summary})
+            return
+
+        # Attach to the video's job, shared with /summarize and other streams
+        progress = queue.Queue()
+        job_id = submit_job(video_url, video_id, progress.put)
+        try:
+            while True:
+                event = progress.get()
+                yield sse_event(event)
+                if event['type'] in ('done', 'error'):
+                    return
+        finally:
+            remove_listener(job_id, progress.put)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def sse_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+@app.route('/status/<job_id>')
+def status(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job ID'}), 404
+        return jsonify({'job_id': job_id, **job})
+
+def extract_video_id(video_url):
+    # Handles watch?v=, youtu.be/, /shorts/, /embed/ and /live/ links on YouTube's
+    # own hosts without a network call; the ID doubles as the summary cache key
+    parsed = urlparse(video_url)
+    host = parsed.hostname or ''
+    if host in YOUTUBE_HOSTS or host.endswith('.youtube.com'):
+        if host == 'youtu.be':
+            video_id = parsed.path.lstrip('/').split('/')[0]
+        else:
+            video_id = parse_qs(parsed.query).get('v', [''])[0]
+            match = re.match(r'/(?:shorts|embed|live)/([^/?#]+)', parsed.path)
+            if match and not video_id:
+                video_id = match.group(1)
+        if not VIDEO_ID_PATTERN.fullmatch(video_id):
+            raise ValueError(f"No YouTube video ID in {video_url!r}")
+        return video_id
+    # Any other site is left to yt_dlp, and keyed by its extractor as well so
+    # another site's ID can never collide with a YouTube one
+    try:
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        raise ValueError(f"Not a supported video URL: {video_url!r}") from e
+    if not info or not info.get('id') or not info.get('extractor_key'):
+        raise ValueError(f"Not a supported video URL: {video_url!r}")
+    if info['extractor_key'] == 'Youtube' and VIDEO_ID_PATTERN.fullmatch(info['id']):
+        return info['id']
+    return f"{info['extractor_key']}:{info['id']}"
+
+def get_cached_summary(video_id):
+    with jobs_lock:
+        entry = summary_cache.get(video_id)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del summary_cache[video_id]
+            return None
+        summary_cache.move_to_end(video_id)
+        return entry[0]
+
+def cache_summary(video_id, summary):
+    with jobs_lock:
+        summary_cache[video_id] = (summary, time.time() + SUMMARY_CACHE_TTL_SEC)
+        summary_cache.move_to_end(video_id)
+        while len(summary_cache) > SUMMARY_CACHE_SIZE:
+            summary_cache.popitem(last=False)
+
+def prune_jobs():
+    # Called with jobs_lock held; drops finished jobs nobody has polled for a while
+    cutoff = time.time() - JOB_TTL_SEC
+    for job_id in [job_id for job_id, job in jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]:
+        del jobs[job_id]
+
+def submit_job(video_url, video_id, listener=None):
+    # A video already being worked on reuses its job; the listener, if any,
+    # first gets the job's current status, then its progress events from now on
+    with jobs_lock:
+        prune_jobs()
+        job_id = next((job_id for job_id, job in jobs.items()
+                       if job['video_id'] == video_id and job['status'] in ('queued', 'running')), None)
+        start = job_id is None
+        if start:
+            job_id = uuid.uuid4().hex
+            jobs[job_id] = {'video_id': video_id, 'status': 'queued', 'summary': None, 'error': None, 'finished_at': None}
+            job_listeners[job_id] = []
+        if listener:
+            # Sent under the lock so it always comes before the job's next event
+            listener({'type': 'status', 'job_id': job_id, 'status': jobs[job_id]['status']})
+            job_listeners[job_id].append(listener)
+    if start:
+        executor.submit(run_job, job_id, video_url, video_id)
+    return job_id
+
+def remove_listener(job_id, listener):
+    with jobs_lock:
+        listeners = job_listeners.get(job_id, [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+def update_job(job_id, **fields):
+    with jobs_lock:
+        jobs[job_id].update(fields)
+
+def publish(job_id, event):
+    with jobs_lock:
+        listeners = list(job_listeners.get(job_id, []))
+    for listener in listeners:
+        listener(event)
+
+def finish_job(job_id, event, **fields):
+    # The status changes and the listeners are detached under one lock, so a
+    # stream either gets the final event or sees the job as finished
+    with jobs_lock:
+        jobs[job_id].update(fields, finished_at=time.time())
+        listeners = job_listeners.pop(job_id, [])
+    for listener in listeners:
+        listener(event)
+
+def run_job(job_id, video_url, video_id):
+    update_job(job_id, status='running')
+    progress = lambda event: publish(job_id, event)
+    try:
+        # Each job gets its own directory so concurrent downloads never collide
+        with tempfile.TemporaryDirectory() as job_dir:
+            # Download audio from YouTube
+            audio_file = download_audio(video_url, job_dir, progress=progress)
+
+            # Transcribe and summarize the audio segment by segment
+            summary = map_reduce_summarize(
+                audio_file, progress=progress,
+                on_token=lambda token: progress({'type': 'token', 'text': token}),
+            )
+
+        cache_summary(video_id, summary)
+        finish_job(job_id, {'type': 'done', 'summary': summary}, status='done', summary=summary)
+    except Exception as e:
+        finish_job(job_id, {'type': 'error', 'error': str(e)}, status='error', error=str(e))
+
+def download_audio(video_url, output_dir='.', progress=None):
     ydl_opts = {
         'format': 'bestaudio[ext=m4a]/bestaudio[ext=mp3]/bestaudio',
-        'outtmpl': 'audio.%(ext)s',
+        'outtmpl': os.path.join(output_dir, 'audio.%(ext)s'),
     }
+    if progress:
+        def hook(d):
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            if d['status'] == 'downloading' and total:
+                progress({'type': 'download', 'percent': 100 * d.get('downloaded_bytes', 0) / total})
+            elif d['status'] == 'finished':
+                progress({'type': 'download', 'percent': 100.0})
+        ydl_opts['progress_hooks'] = [hook]
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(video_url, download=True)
         return ydl.prepare_filename(info)  # Returns the downloaded file's name
 
-def transcribe_audio(file_path):
-    # Transcribe audio using OpenAI Whisper API
-    with open(file_path, "rb") as audio_file:
-        transcript = openai.Audio.transcribe("whisper-1", audio_file)
+def split_audio_segments(file_path, segment_duration_sec=SEGMENT_DURATION_SEC):
+    # Decode the download with PyAV and yield fixed-length in-memory WAV segments
+    segment_bytes = int(segment_duration_sec * SAMPLE_RATE) * 2
+    pcm = bytearray()
+    index = 0
+    with av.open(file_path) as container:
+        audio_stream = next(s for s in container.streams if s.type == 'audio')
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=SAMPLE_RATE)
+        for frame in container.decode(audio_stream):
+            for resampled_frame in resampler.resample(frame):
+                pcm += resampled_frame.to_ndarray().tobytes()
+                while len(pcm) >= segment_bytes:
+                    index += 1
+                    yield make_wav_buffer(bytes(pcm[:segment_bytes]), f'segment_{index}.wav')
+                    del pcm[:segment_bytes]
+        # Flush samples still buffered in the resampler
+        for resampled_frame in resampler.resample(None):
+            pcm += resampled_frame.to_ndarray().tobytes()
+    if pcm:
+        index += 1
+        yield make_wav_buffer(bytes(pcm), f'segment_{index}.wav')
+
+def make_wav_buffer(pcm, name):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm)
+    buffer.seek(0)
+    buffer.name = name  # Whisper uses the name to detect the format
+    return buffer
+
+def transcribe_audio(audio):
+    # Transcribe audio using OpenAI Whisper API; accepts a path or a named file object
+    if isinstance(audio, str):
+        with open(audio, "rb") as audio_file:
+            return transcribe_audio(audio_file)
+    transcript = openai.Audio.transcribe("whisper-1", audio)
     return transcript["text"]
 
-def summarize_text(text):
-    response = openai.ChatCompletion.create(
+def complete_chat(prompt, max_tokens, on_token=None):
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant that summarizes text."},
+        {"role": "user", "content": prompt}
+    ]
+    if on_token is None:
+        response = openai.ChatCompletion.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            temperature=0.5,
+            max_tokens=max_tokens,
+        )
+        return response['choices'][0]['message']['content'].strip()
+
+    # Stream the reply and hand each token to the caller as it arrives
+    parts = []
+    for chunk in openai.ChatCompletion.create(
         model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that summarizes text."},
-            {"role": "user", "content": f"Summarize the following text:\n\n{text}\n\nKey points:"}
-        ],
+        messages=messages,
         temperature=0.5,
-        max_tokens=150,
+        max_tokens=max_tokens,
+        stream=True,
+    ):
+        token = chunk['choices'][0]['delta'].get('content', '')
+        if token:
+            parts.append(token)
+            on_token(token)
+    return ''.join(parts).strip()
+
+def summarize_text(text, on_token=None):
+    return complete_chat(f"Summarize the following text:\n\n{text}\n\nKey points:", 150, on_token)
+
+def combine_summaries(summaries, on_token=None):
+    partials = "\n\n".join(f"Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    return complete_chat(
+        f"Combine these summaries of consecutive parts of one video into a single summary:\n\n{partials}\n\nKey points:",
+        300, on_token,
     )
-    return response['choices'][0]['message']['content'].strip()
+
+# Offline stand-ins for the model backends, for tests and dry runs
+def stub_transcribe(audio):
+    with wave.open(audio, 'rb') as wav_file:
+        return f"[{wav_file.getnframes() / wav_file.getframerate():.0f}s of speech from {audio.name}]"
+
+def stub_summarize(text, on_token=None):
+    return stub_stream(f"Summary of {text}", on_token)
+
+def stub_combine(summaries, on_token=None):
+    return stub_stream(" | ".join(summaries), on_token)
+
+def stub_stream(text, on_token):
+    if on_token:
+        for word in text.split(' '):
+            on_token(word + ' ')
+    return text
+
+def map_reduce_summarize(audio_file, transcribe=transcribe_audio, summarize=summarize_text,
+                         combine=combine_summaries, segment_duration_sec=SEGMENT_DURATION_SEC,
+                         max_workers=MAP_WORKERS, progress=None, on_token=None):
+    # Map: every segment is transcribed and summarized as its own task, so the
+    # latency follows the slowest segment instead of the length of the video.
+    # Reduce: partial summaries are combined in groups until one is left.
+    # Only the final model call streams its tokens to on_token.
+    progress = progress or (lambda event: None)
+    segments = split_audio_segments(audio_file, segment_duration_sec)
+    first = next(segments, None)
+    if first is None:
+        raise ValueError('No audio found in the download')
+    second = next(segments, None)
+    if second is None:
+        # Short video: the single segment summary is the final one
+        transcript = transcribe(first)
+        progress({'type': 'transcribe', 'segment': 1})
+        return summarize(transcript, on_token=on_token)
+
+    def map_segment(i, segment):
+        transcript = transcribe(segment)
+        progress({'type': 'transcribe', 'segment': i + 1})
+        summary = summarize(transcript)
+        progress({'type': 'summarize', 'segment': i + 1})
+        return i, summary
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Decode the next segment only once a worker is free, so at most
+        # max_workers segments are held in memory however long the video is
+        results = {}
+        in_flight = set()
+        for i, segment in enumerate(itertools.chain([first, second], segments)):
+            if len(in_flight) >= max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                results.update(future.result() for future in done)
+            in_flight.add(pool.submit(map_segment, i, segment))
+        results.update(future.result() for future in wait(in_flight)[0])
+        summaries = [results[i] for i in sorted(results)]
+        while len(summaries) > REDUCE_FAN_IN:
+            progress({'type': 'reduce', 'parts': len(summaries)})
+            groups = [summaries[i:i + REDUCE_FAN_IN] for i in range(0, len(summaries), REDUCE_FAN_IN)]
+            summaries = list(pool.map(lambda group: combine(group) if len(group) > 1 else group[0], groups))
+    progress({'type': 'reduce', 'parts': len(summaries)})
+    return combine(summaries, on_token=on_token)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,99 @@
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import Future
+
+# Outbound email shared by the scheduled scripts in this folder, which import
+# it from next to themselves. Nothing here runs at import: each SMTP account
+# gets its dispatcher, and its worker thread, on the first send.
+
+class EmailDispatcher:
+    # Sends queued messages over one logged-in SMTP connection that is reused
+    # between sends, retrying failures with exponential backoff
+    def __init__(self, host="smtp.gmail.com", port=587, use_starttls=True, user=None, password=None,
+                 queue_size=10, max_retries=3):
+        self.host = host
+        self.port = port
+        self.use_starttls = use_starttls
+        self.user = user
+        self.password = password
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.latencies = []
+        self._latencies_lock = threading.Lock()
+        self.server = None
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def _connect(self):
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return self.server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+        print("Connecting to the SMTP server...")
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_starttls:
+            server.starttls()
+        if self.user:
+            print("Logging into the SMTP server...")
+            server.login(self.user, self.password)
+        self.server = server
+        return server
+
+    def send(self, msg):
+        # Blocks while the queue is full; the returned Future resolves to the send latency
+        future = Future()
+        self.queue.put((msg, future))
+        return future
+
+    def _run(self):
+        while True:
+            msg, future = self.queue.get()
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                try:
+                    self._connect().send_message(msg)
+                except (smtplib.SMTPException, OSError) as e:
+                    self.server = None  # Reconnect on the next attempt
+                    if attempt == self.max_retries:
+                        future.set_exception(e)
+                        break
+                    time.sleep(2 ** attempt)
+                except Exception as e:  # Not a delivery problem, retrying will not help
+                    future.set_exception(e)
+                    break
+                else:
+                    latency = time.perf_counter() - start
+                    with self._latencies_lock:
+                        self.latencies.append(latency)
+                    future.set_result(latency)
+                    break
+            self.queue.task_done()
+
+    def print_metrics(self):
+        # Reports the sends since the last report and clears them, so the
+        # scheduler prints per-run numbers without the list growing
+        with self._latencies_lock:
+            latencies, self.latencies = self.latencies, []
+        if latencies:
+            print(
+                f"Emails sent: {len(latencies)}, "
+                f"avg {sum(latencies) / len(latencies):.2f}s, max {max(latencies):.2f}s"
+            )
+
+_email_dispatchers = {}  # (host, port, use_starttls, user) -> EmailDispatcher
+_email_dispatchers_lock = threading.Lock()
+
+def get_email_dispatcher(host, port, use_starttls, user, password, max_retries=3):
+    # One dispatcher, and so one reused connection, per SMTP account
+    key = (host, port, use_starttls, user)
+    with _email_dispatchers_lock:
+        if key not in _email_dispatchers:
+            _email_dispatchers[key] = EmailDispatcher(host, port, use_starttls, user, password,
+                                                      max_retries=max_retries)
+        return _email_dispatchers[key]
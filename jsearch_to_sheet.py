@@ -1,55 +1,255 @@
 import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from twilio.base.exceptions import TwilioRestException
 from twilio.rest import Client
 from apscheduler.schedulers.blocking import BlockingScheduler
 
 JSEARCH_API_KEY = os.environ.get("JSEARCH_API_KEY")
 JSEARCH_API_HOST = "jsearch.p.rapidapi.com"
 
+# Saved searches are separated by ";" and each one is fetched JOB_PAGES pages deep
+JOB_QUERIES = [
+    query.strip()
+    for query in os.environ.get("JOB_QUERIES", os.environ.get("JOB_QUERY", "software engineer")).split(";")
+    if query.strip()
+]
+JOB_PAGES = int(os.environ.get("JOB_PAGES", "1"))
+MAX_WORKERS = 8
+SEEN_JOBS_DB = os.environ.get("SEEN_JOBS_DB", "seen_jobs.db")
+
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.environ.get("TWILIO_FROM_NUMBER")
 SMS_TO_NUMBER = os.environ.get("SMS_TO_NUMBER")
+# Optional override of the Twilio REST endpoint, e.g. a local HTTP stand-in for testing
+TWILIO_API_BASE_URL = os.environ.get("TWILIO_API_BASE_URL")
+SMS_MAX_LENGTH = 1500
+SMS_MAX_RETRIES = 3  # Retries of rate limits, server errors and failed connections
+
 
+def create_session():
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.headers.update({
+        "X-RapidAPI-Key": JSEARCH_API_KEY,
+        "X-RapidAPI-Host": JSEARCH_API_HOST,
+    })
+    session.mount("https://", adapter)
+    return session
 
-def fetch_jsearch_jobs():
+
+session = create_session()
+
+
+def fetch_jsearch_jobs(query, pages=JOB_PAGES):
     url = f"https://{JSEARCH_API_HOST}/search"
+    # One request with num_pages costs less quota than one request per page
     params = {
-        "query": os.environ.get("JOB_QUERY", "software engineer"),
+        "query": query,
         "page": "1",
-        "num_pages": "1",
+        "num_pages": str(pages),
     }
-    headers = {
-        "X-RapidAPI-Key": JSEARCH_API_KEY,
-        "X-RapidAPI-Host": JSEARCH_API_HOST,
-    }
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+    response = session.get(url, params=params, timeout=30)
     response.raise_for_status()
     data = response.json()
     return data.get("data", [])
 
 
+def harvest_jobs(queries=JOB_QUERIES, pages=JOB_PAGES):
+    def fetch(query):
+        try:
+            return fetch_jsearch_jobs(query, pages)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching jobs for {query!r}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(fetch, queries))
+
+    # The same posting often matches several saved searches
+    jobs = {}
+    for query_jobs in results:
+        for job in query_jobs:
+            if job.get("job_id"):
+                jobs.setdefault(job["job_id"], job)
+    return list(jobs.values())
+
+
+def open_seen_index(db_path=SEEN_JOBS_DB):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS seen_jobs (job_id TEXT PRIMARY KEY, first_seen TEXT)")
+    conn.commit()
+    return conn
+
+
+def filter_new_jobs(conn, jobs):
+    seen = set()
+    job_ids = [job["job_id"] for job in jobs]
+    # Stay under SQLite's limit on bound parameters
+    for i in range(0, len(job_ids), 500):
+        batch = job_ids[i : i + 500]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(f"SELECT job_id FROM seen_jobs WHERE job_id IN ({placeholders})", batch)
+        seen.update(row[0] for row in rows)
+    return [job for job in jobs if job["job_id"] not in seen]
+
+
+def mark_jobs_seen(conn, jobs):
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        "INSERT OR IGNORE INTO seen_jobs (job_id, first_seen) VALUES (?, ?)",
+        [(job["job_id"], now) for job in jobs],
+    )
+    conn.commit()
+
+
+def pack_lines(lines, max_length=SMS_MAX_LENGTH):
+    # Pack whole lines into messages so no job line is cut in half; only a
+    # single line longer than max_length is split. Returns (message, indexes
+    # of the lines it carries) pairs.
+    messages, current, members = [], "", []
+    for i, line in enumerate(lines):
+        while len(line) > max_length:
+            if current:
+                messages.append((current, members))
+                current, members = "", []
+            messages.append((line[:max_length], [i]))
+            line = line[max_length:]
+        if current and len(current) + 1 + len(line) > max_length:
+            messages.append((current, members))
+            current, members = line, [i]
+        else:
+            current = f"{current}\n{line}" if current else line
+            members.append(i)
+    if current:
+        messages.append((current, members))
+    return messages
+
+
+class SmsDispatcher:
+    # Sends queued SMS bodies through one reused Twilio client from a background
+    # worker, retrying rate limits, server errors and failed connections with
+    # exponential backoff. Other errors are not retried: a bad configuration
+    # will not fix itself, and a read timeout may mean the message was sent.
+    def __init__(self, queue_size=20, max_retries=SMS_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.latencies = []
+        self._latencies_lock = threading.Lock()
+        self.client = None
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def _get_client(self):
+        if self.client is None:
+            self.client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+            if TWILIO_API_BASE_URL:
+                self.client.api.base_url = TWILIO_API_BASE_URL
+        return self.client
+
+    def send(self, body, to=SMS_TO_NUMBER):
+        # Blocks while the queue is full; the returned Future resolves to the send latency
+        future = Future()
+        self.queue.put((body, to, future))
+        return future
+
+    def _run(self):
+        while True:
+            body, to, future = self.queue.get()
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                try:
+                    self._get_client().messages.create(body=body, from_=TWILIO_FROM_NUMBER, to=to)
+                except Exception as e:
+                    retryable = isinstance(e, requests.exceptions.ConnectionError) or (
+                        isinstance(e, TwilioRestException) and (e.status == 429 or e.status >= 500)
+                    )
+                    if not retryable or attempt == self.max_retries:
+                        future.set_exception(e)
+                        break
+                    time.sleep(2 ** attempt)
+                else:
+                    latency = time.perf_counter() - start
+                    with self._latencies_lock:
+                        self.latencies.append(latency)
+                    future.set_result(latency)
+                    break
+            self.queue.task_done()
+
+    def print_metrics(self):
+        # Reports the sends since the last report and clears them, so the
+        # scheduler prints per-run numbers without the list growing
+        with self._latencies_lock:
+            latencies, self.latencies = self.latencies, []
+        if latencies:
+            print(
+                f"SMS sent: {len(latencies)}, "
+                f"avg {sum(latencies) / len(latencies):.2f}s, max {max(latencies):.2f}s"
+            )
+
+
+_sms_dispatcher = None
+_sms_dispatcher_lock = threading.Lock()
+
+
+def get_sms_dispatcher():
+    # Created on the first report rather than at import, so loading the
+    # script starts no worker thread
+    global _sms_dispatcher
+    with _sms_dispatcher_lock:
+        if _sms_dispatcher is None:
+            _sms_dispatcher = SmsDispatcher()
+        return _sms_dispatcher
+
+
 def send_sms_report(jobs):
-    client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    # Returns the jobs whose messages were delivered; a job whose line was
+    # split over several messages counts only once all of them were
     lines = [
         f"{job.get('job_title')} - {job.get('employer_name')} (Fit: {job.get('fit_score', 'N/A')})"
         for job in jobs
     ]
     if not lines:
-        return
-    text = "\n".join(lines)
-    max_length = 1500
-    for i in range(0, len(text), max_length):
-        client.messages.create(
-            body=text[i : i + max_length],
-            from_=TWILIO_FROM_NUMBER,
-            to=SMS_TO_NUMBER,
-        )
+        return []
+    sms_dispatcher = get_sms_dispatcher()
+    sent = [(sms_dispatcher.send(body), members) for body, members in pack_lines(lines)]
+    failed = set()
+    for future, members in sent:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Error sending SMS for {len(members)} jobs: {e}")
+            failed.update(members)
+    sms_dispatcher.print_metrics()
+    return [job for i, job in enumerate(jobs) if i not in failed]
 
 
 def main():
-    jobs = fetch_jsearch_jobs()
-    send_sms_report(jobs)
+    jobs = harvest_jobs()
+    conn = open_seen_index()
+    try:
+        new_jobs = filter_new_jobs(conn, jobs)
+        print(f"Fetched {len(jobs)} jobs for {len(JOB_QUERIES)} queries, {len(new_jobs)} new")
+        delivered = send_sms_report(new_jobs)
+        # Only mark jobs once they have been reported, so a failed send is retried
+        mark_jobs_seen(conn, delivered)
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
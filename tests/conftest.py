@@ -0,0 +1,55 @@
+import importlib.util
+import re
+import sys
+import threading
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+from werkzeug.serving import make_server
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(relative_path):
+    # Most scripts have no .py extension and spaces in their names, so they
+    # are loaded from their path rather than imported. Like a script run
+    # directly, each one can import the modules next to it.
+    path = REPO_ROOT / relative_path
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    name = re.sub(r"\W+", "_", path.stem).strip("_").lower()
+    loader = SourceFileLoader(name, str(path))
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(name, loader))
+    loader.exec_module(module)
+    return module
+
+
+class LocalServer:
+    # Serves a WSGI app on a free local port from a background thread
+    def __init__(self, app):
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.thread.join()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(app):
+        server = LocalServer(app).__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
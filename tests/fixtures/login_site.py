@@ -0,0 +1,73 @@
+"""Local stand-in for automated.pythonanywhere.com: a Django-style login form
+with a CSRF cookie, and a home page that shows the temperature once logged in.
+
+Run it directly to point the scraper at it by hand:
+    python tests/fixtures/login_site.py
+    BASE_URL=http://127.0.0.1:5000 python "AutomateLoginProcess/Log in, Click, and Scrape"
+"""
+import secrets
+
+from flask import Flask, abort, make_response, redirect, request, session
+
+USERNAME = "automated"
+PASSWORD = "automatedautomated"
+TEMPERATURE = 21.25
+
+LOGIN_PAGE = """<html><body>
+<form method="post">
+<input type="hidden" name="csrfmiddlewaretoken" value="{token}">
+<input id="id_username" name="username">
+<input id="id_password" name="password" type="password">
+</form>
+</body></html>"""
+
+HOME_PAGE = """<html><body>
+<nav><div><a href="/">Home</a></div></nav>
+<div><div><h1>Hello, {username}</h1><h1>{temperature}</h1></div></div>
+{script}
+</body></html>"""
+
+# What a browser runs on the javascript_only page; FakeDriver-style test
+# drivers have to play it back themselves
+FILL_IN_SCRIPT = """<script>
+document.querySelectorAll("h1")[1].textContent = "Average world temperature now: {temperature}";
+</script>"""
+
+
+def create_app(javascript_only=False):
+    # With javascript_only the temperature is left out of the HTML, as if a
+    # script filled it in after the page loaded
+    app = Flask(__name__)
+    app.secret_key = secrets.token_hex(16)
+    app.config["LOGINS"] = 0
+
+    @app.route("/login/", methods=["GET", "POST"])
+    def login():
+        if request.method == "POST":
+            if request.form.get("csrfmiddlewaretoken") != request.cookies.get("csrftoken"):
+                abort(403)
+            if request.form.get("username") == USERNAME and request.form.get("password") == PASSWORD:
+                session["username"] = USERNAME
+                app.config["LOGINS"] += 1
+                return redirect("/")
+            return redirect("/login/")
+        token = secrets.token_hex(16)
+        response = make_response(LOGIN_PAGE.format(token=token))
+        response.set_cookie("csrftoken", token)
+        return response
+
+    @app.route("/")
+    def home():
+        if "username" not in session:
+            return redirect("/login/")
+        if javascript_only:
+            return HOME_PAGE.format(username=session["username"], temperature="",
+                                    script=FILL_IN_SCRIPT.format(temperature=TEMPERATURE))
+        return HOME_PAGE.format(username=session["username"], temperature=f"Average world temperature now: {TEMPERATURE}",
+                                script="")
+
+    return app
+
+
+if __name__ == "__main__":
+    create_app().run()
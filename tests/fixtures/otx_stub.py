@@ -0,0 +1,54 @@
+"""Local stand-in for the OTX pulses API, for ThreatIntelDaily's OTXClient.
+
+Serves app.config["PULSES"] from /api/v1/pulses/subscribed in pages of the
+requested limit, newest first, filtered by modified_since. Every request's
+query is recorded in app.config["REQUESTS"]. With app.config["COUNT"] off,
+pages carry no total count, so clients have to follow the "next" links.
+Page numbers in app.config["FAIL_PAGES"] answer 500.
+"""
+import math
+from urllib.parse import urlencode
+
+from flask import Flask, abort, jsonify, request
+
+
+def make_pulse(n, modified):
+    return {
+        "id": f"pulse{n:04d}",
+        "name": f"Pulse {n}",
+        "author_name": f"author{n % 3}",
+        "created": modified,
+        "modified": modified,
+        "tags": [f"tag{n % 4}"],
+        "description": f"Description of pulse {n}",
+    }
+
+
+def create_app(pulses=(), count=True):
+    app = Flask(__name__)
+    app.config["PULSES"] = list(pulses)
+    app.config["COUNT"] = count
+    app.config["FAIL_PAGES"] = set()
+    app.config["REQUESTS"] = []
+
+    @app.route("/api/v1/pulses/subscribed")
+    def subscribed():
+        app.config["REQUESTS"].append(request.args.to_dict())
+        limit = int(request.args.get("limit", 20))
+        page = int(request.args.get("page", 1))
+        if page in app.config["FAIL_PAGES"]:
+            abort(500)
+        since = request.args.get("modified_since")
+        pulses = sorted(
+            (pulse for pulse in app.config["PULSES"] if not since or pulse["modified"] > since),
+            key=lambda pulse: pulse["modified"], reverse=True,
+        )
+        next_url = None
+        if page < math.ceil(len(pulses) / limit):
+            next_url = f"{request.base_url}?{urlencode(dict(request.args, page=page + 1))}"
+        body = {"results": pulses[(page - 1) * limit:page * limit], "next": next_url}
+        if app.config["COUNT"]:
+            body["count"] = len(pulses)
+        return jsonify(body)
+
+    return app
@@ -0,0 +1,35 @@
+"""Local stand-in for the Twilio Messages API, for TWILIO_API_BASE_URL.
+
+Every message body posted is recorded in app.config["MESSAGES"]. A body
+containing a key of app.config["FAILURES"] is answered with the next status
+code in that key's list; once the list is used up the message is accepted.
+"""
+from urllib.parse import parse_qs
+
+from flask import Flask, jsonify, request
+
+
+def create_app(failures=None):
+    app = Flask(__name__)
+    app.config["MESSAGES"] = []
+    app.config["FAILURES"] = {marker: list(statuses) for marker, statuses in (failures or {}).items()}
+
+    @app.route("/2010-04-01/Accounts/<account_sid>/Messages.json", methods=["POST"])
+    def create_message(account_sid):
+        form = parse_qs(request.get_data(as_text=True))
+        body = form["Body"][0]
+        app.config["MESSAGES"].append(body)
+        for marker, statuses in app.config["FAILURES"].items():
+            if marker in body and statuses:
+                status = statuses.pop(0)
+                return jsonify({"code": 20000 + status, "message": f"Stub error {status}", "status": status}), status
+        return jsonify({
+            "sid": f"SM{len(app.config['MESSAGES']):032d}",
+            "account_sid": account_sid,
+            "to": form["To"][0],
+            "from": form["From"][0],
+            "body": body,
+            "status": "queued",
+        }), 201
+
+    return app
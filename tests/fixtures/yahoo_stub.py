@@ -0,0 +1,41 @@
+"""Local stand-in for the Yahoo Finance CSV download, for YAHOO_BASE_URL.
+
+Serves one made-up row per day in [period1, period2) and records each
+request as (ticker, start, end) in app.config["REQUESTS"]. Tickers listed in
+app.config["MISSING"] answer 404.
+"""
+from datetime import date, timedelta
+
+from flask import Flask, Response, request
+
+HEADER = "Date,Open,High,Low,Close,Adj Close,Volume\n"
+
+
+def close_price(ticker, day):
+    return len(ticker) * 10 + day.toordinal() % 7
+
+
+def create_app(missing=()):
+    app = Flask(__name__)
+    app.config["REQUESTS"] = []
+    app.config["MISSING"] = set(missing)
+
+    @app.route("/v7/finance/download/<ticker>")
+    def download(ticker):
+        start = date.fromtimestamp(int(request.args["period1"]))
+        end = date.fromtimestamp(int(request.args["period2"]))
+        app.config["REQUESTS"].append((ticker, start, end))
+        if ticker in app.config["MISSING"]:
+            return Response("404 Not Found: No data found, symbol may be delisted", status=404)
+
+        def rows():
+            yield HEADER
+            day = start
+            while day < end:
+                close = close_price(ticker, day)
+                yield f"{day},{close},{close + 1},{close - 1},{close},{close},1000\n"
+                day += timedelta(days=1)
+
+        return Response(rows(), mimetype="text/csv")
+
+    return app
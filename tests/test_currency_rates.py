@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from conftest import load_script
+
+scraper = load_script("ScapingValues/Scrape Real-Time Currency Rate with Beautiful Soup")
+rest_api = load_script("Acessing | Building APIs/Create Your Own Currency Rate REST API")
+
+# Pages saved from x-rates.com for 1 USD, trimmed to the parts the scrapers read
+PAGES = {
+    "calculator": (Path(__file__).parent / "fixtures" / "x_rates_calculator.html").read_bytes(),
+    "table": (Path(__file__).parent / "fixtures" / "x_rates_table.html").read_bytes(),
+}
+
+USD_RATES = {"USD": 1.0, "AUD": 1.523456, "EUR": 0.920436, "GBP": 0.791203, "JPY": 1149.52}
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.text = content.decode()
+
+
+@pytest.mark.parametrize("module, rule, page", [
+    (scraper, scraper.RULES["calculator"], "calculator"),
+    (scraper, scraper.RULES["table"], "table"),
+    (rest_api, rest_api.RATE_CELL_RULE, "table"),
+])
+def test_extractors_agree(module, rule, page):
+    expected = module.extract_full(PAGES[page], rule)
+    assert expected
+    for name, extractor in module.EXTRACTORS.items():
+        assert extractor(PAGES[page], rule) == expected, name
+
+
+def test_both_scripts_extract_the_same_cells():
+    # The two scripts carry their own copy of the extraction code
+    for name, extractor in scraper.EXTRACTORS.items():
+        assert extractor(PAGES["table"], scraper.RULES["table"]) == \
+            rest_api.EXTRACTORS[name](PAGES["table"], rest_api.RATE_CELL_RULE)
+
+
+@pytest.mark.parametrize("extractor", sorted(scraper.EXTRACTORS))
+def test_get_currency_reads_the_calculator(extractor, monkeypatch):
+    urls = []
+
+    def get(url):
+        urls.append(url)
+        return FakeResponse(PAGES["calculator"])
+
+    monkeypatch.setattr(scraper.requests, "get", get)
+    assert scraper.get_currency("USD", "AUD", extractor) == 1.523456
+    assert urls == ["https://www.x-rates.com/calculator/?from=USD&to=AUD&amount=1"]
+
+
+@pytest.mark.parametrize("extractor", sorted(rest_api.EXTRACTORS))
+def test_get_rate_table_parses_the_table(extractor, monkeypatch):
+    class Session:
+        def get(self, url, timeout):
+            assert url == "https://www.x-rates.com/table/?from=USD&amount=1"
+            return FakeResponse(PAGES["table"])
+
+    monkeypatch.setattr(rest_api, "session", Session())
+    # Inverse columns and the unreadable VES cell are skipped
+    assert rest_api.get_rate_table("USD", extractor) == USD_RATES
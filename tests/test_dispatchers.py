@@ -0,0 +1,172 @@
+import smtplib
+import socket
+import threading
+from email.mime.text import MIMEText
+
+import pytest
+from aiosmtpd.controller import Controller
+from twilio.base.exceptions import TwilioException
+
+from conftest import load_script
+from fixtures import twilio_stub
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture(scope="module")
+def notify():
+    return load_script("AI/notify.py")
+
+
+@pytest.fixture(scope="module")
+def jsearch():
+    # SmsDispatcher.send binds SMS_TO_NUMBER as a default when the script loads
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SMS_TO_NUMBER", "+15551111111")
+        return load_script("jsearch_to_sheet.py")
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    return sleeps
+
+
+def make_message(i):
+    msg = MIMEText(f"Report {i}")
+    msg["From"] = "reports@example.com"
+    msg["To"] = "analyst@example.com"
+    msg["Subject"] = f"Report {i}"
+    return msg
+
+
+def test_emails_share_one_smtp_connection(notify, smtp_server, monkeypatch, capsys):
+    controller, handler = smtp_server
+    connections = []
+
+    class CountingSMTP(smtplib.SMTP):
+        def __init__(self, *args, **kwargs):
+            connections.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(smtplib, "SMTP", CountingSMTP)
+    dispatcher = notify.EmailDispatcher(host=controller.hostname, port=controller.port, use_starttls=False)
+    for future in [dispatcher.send(make_message(i)) for i in range(3)]:
+        future.result(timeout=10)
+
+    assert len(handler.messages) == 3
+    assert len(connections) == 1
+    dispatcher.print_metrics()
+    assert "Emails sent: 3" in capsys.readouterr().out
+    assert dispatcher.latencies == []
+
+
+def test_email_fails_after_retries(notify, no_backoff):
+    dispatcher = notify.EmailDispatcher(host="127.0.0.1", port=free_port(), use_starttls=False, max_retries=2)
+
+    with pytest.raises(OSError):
+        dispatcher.send(make_message(0)).result(timeout=10)
+    assert no_backoff == [1, 2]
+
+
+@pytest.mark.parametrize("script", ["AI/DailyPracticeQuestions", "AI/ThreatIntelDaily.py"])
+def test_scripts_start_no_dispatcher_on_import(script, smtp_server, tmp_path, monkeypatch):
+    controller, handler = smtp_server
+    threads = set(threading.enumerate())
+    module = load_script(script)
+    assert set(threading.enumerate()) == threads
+
+    monkeypatch.setattr(module, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(module, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(module, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(module, "EMAIL_USER", "reports@example.com")
+    monkeypatch.setattr(smtplib.SMTP, "login", lambda self, user, password: (235, b"OK"))
+    if hasattr(module, "send_email"):
+        assert module.send_email("Question", "What is CISA?", "analyst@example.com")
+    else:
+        attachment = tmp_path / "report.pdf"
+        attachment.write_bytes(b"%PDF-1.4")
+        module.send_email_with_attachment("Report", "Attached", "analyst@example.com", str(attachment))
+    assert len(handler.messages) == 1
+
+
+@pytest.fixture
+def twilio(jsearch, serve, monkeypatch):
+    app = twilio_stub.create_app()
+    server = serve(app)
+    monkeypatch.setattr(jsearch, "TWILIO_ACCOUNT_SID", "AC00000000000000000000000000000000")
+    monkeypatch.setattr(jsearch, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(jsearch, "TWILIO_FROM_NUMBER", "+15550000000")
+    monkeypatch.setattr(jsearch, "TWILIO_API_BASE_URL", server.url)
+    monkeypatch.setattr(jsearch, "_sms_dispatcher", jsearch.SmsDispatcher())
+    return app
+
+
+def make_jobs(*titles):
+    # Long employer names so every job needs a message of its own
+    return [{"job_id": str(i), "job_title": title, "employer_name": "x" * 900} for i, title in enumerate(titles)]
+
+
+def test_only_delivered_jobs_are_reported(jsearch, twilio, no_backoff):
+    twilio.config["FAILURES"] = {"Invalid": [400], "Busy": [503]}
+    delivered = jsearch.send_sms_report(make_jobs("Engineer", "Invalid", "Busy", "Analyst"))
+
+    assert [job["job_title"] for job in delivered] == ["Engineer", "Busy", "Analyst"]
+    messages = twilio.config["MESSAGES"]
+    # The 400 is not retried, the 503 is retried once
+    assert sum("Invalid" in body for body in messages) == 1
+    assert sum("Busy" in body for body in messages) == 2
+    assert no_backoff == [1]
+
+
+def test_job_split_over_messages_needs_all_of_them(jsearch, twilio, no_backoff):
+    twilio.config["FAILURES"] = {"z" * 10: [400]}
+    jobs = [{"job_id": "0", "job_title": "Engineer", "employer_name": "y" * 1400 + "z" * 400}]
+    assert jsearch.send_sms_report(jobs) == []
+    assert len(twilio.config["MESSAGES"]) == 2
+
+
+def test_sms_connection_errors_are_retried(jsearch, monkeypatch, no_backoff):
+    monkeypatch.setattr(jsearch, "TWILIO_ACCOUNT_SID", "AC00000000000000000000000000000000")
+    monkeypatch.setattr(jsearch, "TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setattr(jsearch, "TWILIO_API_BASE_URL", f"http://127.0.0.1:{free_port()}")
+    dispatcher = jsearch.SmsDispatcher(max_retries=2)
+
+    with pytest.raises(jsearch.requests.exceptions.ConnectionError):
+        dispatcher.send("hello", to="+15551111111").result(timeout=10)
+    assert no_backoff == [1, 2]
+
+
+def test_sms_configuration_errors_are_not_retried(jsearch, no_backoff):
+    dispatcher = jsearch.SmsDispatcher(max_retries=2)
+
+    def missing_credentials():
+        raise TwilioException("Credentials are required to create a TwilioClient")
+
+    dispatcher._get_client = missing_credentials
+    with pytest.raises(TwilioException):
+        dispatcher.send("hello", to="+15551111111").result(timeout=10)
+    assert no_backoff == []
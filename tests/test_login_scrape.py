@@ -0,0 +1,193 @@
+from functools import partial
+
+import pytest
+import requests
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from selenium.webdriver.common.keys import Keys
+
+from conftest import load_script
+from fixtures import login_site
+
+scraper = load_script("AutomateLoginProcess/Log in, Click, and Scrape")
+
+
+class FakeElement:
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+
+    @property
+    def text(self):
+        return self.node.text_content()
+
+    def send_keys(self, value):
+        submit = value.endswith(Keys.RETURN)
+        self.driver.form[self.node.get("name")] = value.rstrip(Keys.RETURN)
+        if submit:
+            self.driver.submit()
+
+
+class FakeDriver:
+    # Just enough of a WebDriver for the scraper, backed by requests, so the
+    # pool can be tested without a browser
+    instances = []
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.current_url = None
+        self.tree = None
+        self.form = {}
+        self.quit_called = False
+        FakeDriver.instances.append(self)
+
+    def _load(self, response):
+        self.current_url = response.url
+        self.tree = lxml_html.fromstring(response.content)
+        self.form = {
+            node.get("name"): node.get("value", "")
+            for node in self.tree.xpath("//form//input[@name]")
+        }
+
+    def get(self, url):
+        if self.quit_called:
+            raise WebDriverException("Browser has been closed")
+        self._load(self.session.get(url))
+
+    def submit(self):
+        self._load(self.session.post(self.current_url, data=self.form))
+
+    def find_element(self, by="id", value=None):
+        nodes = self.tree.xpath(f'//*[@id="{value}"]' if by == "id" else value)
+        if not nodes:
+            raise NoSuchElementException(value)
+        return FakeElement(self, nodes[0])
+
+    def quit(self):
+        self.quit_called = True
+
+
+class ScriptedDriver(FakeDriver):
+    # Plays back the javascript_only page's script, which a real browser would
+    # run, by filling in the empty temperature heading
+    def find_element(self, by="id", value=None):
+        element = super().find_element(by, value)
+        if value == scraper.TEMPERATURE_XPATH and not element.text:
+            element.node.text = f"Average world temperature now: {login_site.TEMPERATURE}"
+        return element
+
+
+@pytest.fixture
+def start_site(serve, monkeypatch):
+    def start(**kwargs):
+        app = login_site.create_app(**kwargs)
+        server = serve(app)
+        monkeypatch.setattr(scraper, "BASE_URL", server.url)
+        return app
+
+    FakeDriver.instances = []
+    return start
+
+
+@pytest.fixture
+def site(start_site):
+    return start_site()
+
+
+@pytest.fixture
+def run_main(monkeypatch):
+    # Runs main() with the pool's browsers replaced by ScriptedDriver
+    def run(backend, samples):
+        monkeypatch.setattr(scraper, "BACKEND", backend)
+        monkeypatch.setattr(scraper, "SAMPLES", samples)
+        monkeypatch.setattr(scraper, "DriverPool", partial(scraper.DriverPool, create_driver=ScriptedDriver))
+        return scraper.main()
+
+    return run
+
+
+def test_pool_logs_in_once_per_driver(site):
+    with scraper.DriverPool(size=3, create_driver=FakeDriver) as pool:
+        temperatures = scraper.scrape_many(pool, 12)
+
+    assert temperatures == [login_site.TEMPERATURE] * 12
+    assert len(FakeDriver.instances) <= 3
+    assert site.config["LOGINS"] == len(FakeDriver.instances)
+    assert all(driver.quit_called for driver in FakeDriver.instances)
+
+
+def test_lost_session_cookie_logs_in_again(site):
+    with scraper.DriverPool(size=1, create_driver=FakeDriver) as pool:
+        with pool.session() as driver:
+            assert scraper.scrape_temperature(driver) == login_site.TEMPERATURE
+        driver.session.cookies.clear()
+        assert scraper.scrape_many(pool, 2) == [login_site.TEMPERATURE] * 2
+
+    assert len(FakeDriver.instances) == 1
+    assert site.config["LOGINS"] == 2
+
+
+def test_dead_driver_is_replaced(site):
+    with scraper.DriverPool(size=1, create_driver=FakeDriver) as pool:
+        with pool.session() as driver:
+            driver.quit()  # The browser crashed
+        with pytest.raises(WebDriverException):
+            scraper.scrape_many(pool, 1)
+        assert pool.drivers == []
+
+        assert scraper.scrape_many(pool, 1) == [login_site.TEMPERATURE]
+        assert len(FakeDriver.instances) == 2
+        assert pool.drivers == [FakeDriver.instances[1]]
+
+
+def test_timed_out_driver_is_kept(site):
+    with scraper.DriverPool(size=1, create_driver=FakeDriver) as pool:
+        with pytest.raises(TimeoutException):
+            with pool.session():
+                raise TimeoutException("Temperature never rendered")
+        assert scraper.scrape_many(pool, 1) == [login_site.TEMPERATURE]
+
+    assert len(FakeDriver.instances) == 1
+
+
+def test_pool_never_exceeds_its_size(site):
+    with scraper.DriverPool(size=2, create_driver=FakeDriver) as pool:
+        scraper.scrape_many(pool, 20)
+        assert len(pool.drivers) <= 2
+
+    assert len(FakeDriver.instances) <= 2
+
+
+def test_http_backend_logs_in_once(site):
+    assert scraper.http_scrape_many(12) == [login_site.TEMPERATURE] * 12
+    assert site.config["LOGINS"] == 1
+
+
+def test_http_backend_needs_the_value_in_the_html(start_site):
+    start_site(javascript_only=True)
+    with pytest.raises(scraper.JavaScriptRequired):
+        scraper.http_scrape_many(1)
+
+
+def test_main_skips_the_browsers_when_http_works(site, run_main):
+    assert run_main("auto", 3) == [login_site.TEMPERATURE] * 3
+    assert FakeDriver.instances == []
+    assert site.config["LOGINS"] == 1
+
+
+def test_main_falls_back_to_the_pool_for_javascript_pages(start_site, run_main, capsys):
+    site = start_site(javascript_only=True)
+    assert run_main("auto", 3) == [login_site.TEMPERATURE] * 3
+
+    assert "falling back to Selenium" in capsys.readouterr().out
+    assert 1 <= len(FakeDriver.instances) <= 3
+    assert all(isinstance(driver, ScriptedDriver) for driver in FakeDriver.instances)
+    # One login over HTTP before the fallback, then one per browser
+    assert site.config["LOGINS"] == 1 + len(FakeDriver.instances)
+
+
+def test_main_does_not_fall_back_when_http_is_forced(start_site, run_main):
+    start_site(javascript_only=True)
+    with pytest.raises(scraper.JavaScriptRequired):
+        run_main("http", 1)
+    assert FakeDriver.instances == []
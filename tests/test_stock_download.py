@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import load_script
+from fixtures import yahoo_stub
+
+stocks = load_script("ScapingValues/Download Stock Data for Any Company for Any Date")
+
+
+@pytest.mark.parametrize("covered, start, end, expected", [
+    ([], (1, 1), (1, 31), [((1, 1), (1, 31))]),
+    ([((1, 1), (1, 31))], (1, 5), (1, 20), []),
+    ([((1, 10), (1, 20))], (1, 1), (1, 31), [((1, 1), (1, 10)), ((1, 20), (1, 31))]),
+    ([((1, 1), (1, 10)), ((1, 20), (2, 1))], (1, 5), (2, 10), [((1, 10), (1, 20)), ((2, 1), (2, 10))]),
+    ([((1, 15), (1, 20)), ((1, 1), (1, 16))], (1, 1), (1, 31), [((1, 20), (1, 31))]),
+    ([((2, 1), (2, 10))], (1, 1), (1, 31), [((1, 1), (1, 31))]),
+])
+def test_missing_ranges(covered, start, end, expected):
+    def day(month_day):
+        return date(2024, *month_day)
+
+    covered = [(day(s), day(e)) for s, e in covered]
+    expected = [(day(s), day(e)) for s, e in expected]
+    assert stocks.missing_ranges(covered, day(start), day(end)) == expected
+
+
+@pytest.fixture
+def yahoo(serve, monkeypatch):
+    app = yahoo_stub.create_app(missing={"GONE"})
+    server = serve(app)
+    monkeypatch.setattr(stocks, "YAHOO_BASE_URL", server.url)
+    return app
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    return {"cache_dir": str(tmp_path / "cache"), "dataset_dir": str(tmp_path / "dataset")}
+
+
+def test_only_missing_days_are_downloaded(yahoo, dirs):
+    rows = stocks.download_tickers(["AAPL", "MSFT"], date(2024, 1, 10), date(2024, 2, 1), **dirs)
+    assert rows == {"AAPL": 22, "MSFT": 22}
+    assert len(yahoo.config["REQUESTS"]) == 2
+
+    # A wider window only asks for the days on either side of the cached ones
+    yahoo.config["REQUESTS"].clear()
+    rows = stocks.download_tickers(["AAPL", "MSFT"], date(2024, 1, 1), date(2024, 2, 15), **dirs)
+    assert rows == {"AAPL": 45, "MSFT": 45}
+    assert sorted(yahoo.config["REQUESTS"]) == [
+        (ticker, start, end)
+        for ticker in ("AAPL", "MSFT")
+        for start, end in ((date(2024, 1, 1), date(2024, 1, 10)), (date(2024, 2, 1), date(2024, 2, 15)))
+    ]
+
+    # Everything is cached now
+    yahoo.config["REQUESTS"].clear()
+    rows = stocks.download_tickers(["AAPL", "MSFT"], date(2024, 1, 5), date(2024, 2, 10), **dirs)
+    assert yahoo.config["REQUESTS"] == []
+    assert rows == {"AAPL": 45, "MSFT": 45}
+
+
+def test_dataset_is_partitioned_by_ticker(yahoo, dirs):
+    stocks.download_tickers(["AAPL", "IBM"], date(2024, 3, 1), date(2024, 3, 8), **dirs)
+    stocks.download_tickers(["AAPL"], date(2024, 3, 5), date(2024, 3, 12), **dirs)
+
+    data = pd.read_parquet(dirs["dataset_dir"])
+    counts = data.groupby("ticker", observed=True)["Date"].agg(["min", "max", "count"])
+    assert counts.loc["AAPL"].tolist() == [pd.Timestamp(2024, 3, 1), pd.Timestamp(2024, 3, 11), 11]
+    assert counts.loc["IBM"].tolist() == [pd.Timestamp(2024, 3, 1), pd.Timestamp(2024, 3, 7), 7]
+    aapl = data[data["ticker"] == "AAPL"].set_index("Date")["Close"]
+    assert aapl[pd.Timestamp(2024, 3, 6)] == yahoo_stub.close_price("AAPL", date(2024, 3, 6))
+
+
+def test_failed_download_is_retried_next_run(yahoo, dirs):
+    rows = stocks.download_tickers(["GONE"], date(2024, 1, 1), date(2024, 1, 8), **dirs)
+    assert rows == {"GONE": 0}
+
+    yahoo.config["MISSING"].clear()
+    yahoo.config["REQUESTS"].clear()
+    rows = stocks.download_tickers(["GONE"], date(2024, 1, 1), date(2024, 1, 8), **dirs)
+    assert yahoo.config["REQUESTS"] == [("GONE", date(2024, 1, 1), date(2024, 1, 8))]
+    assert rows == {"GONE": 7}
+
+
+def test_days_from_today_are_never_cached(yahoo, dirs):
+    today = date.today()
+    for _ in range(2):
+        stocks.download_tickers(["NOW"], today - timedelta(days=3), today + timedelta(days=1), **dirs)
+
+    # The second run only asks for today again
+    assert yahoo.config["REQUESTS"][1] == ("NOW", today, today + timedelta(days=1))
+    assert stocks.load_ranges("NOW", dirs["cache_dir"]) == [(today - timedelta(days=3), today)]
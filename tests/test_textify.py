@@ -0,0 +1,105 @@
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module", params=["AI/Textify.py", "AI/Textify2.py"])
+def textify(request):
+    return load_script(request.param)
+
+
+def make_chunks(textify, count, seconds=1):
+    return [
+        textify.make_wav_buffer(np.zeros(SAMPLE_RATE * seconds, dtype=np.int16).tobytes(), f"chunk_{i + 1}.wav")
+        for i in range(count)
+    ]
+
+
+def test_transcriptions_are_saved_in_playback_order(textify, tmp_path):
+    def transcribe(audio):
+        # Later chunks finish first
+        time.sleep(0.01 * (10 - int(audio.name.split("_")[1].split(".")[0])))
+        return textify.stub_transcribe(audio)
+
+    output_file = tmp_path / "transcription.txt"
+    texts = textify.transcribe_audio_chunks(make_chunks(textify, 8), str(output_file), transcribe, max_workers=4)
+
+    assert texts == [f"[chunk_{i}.wav: 1.0s of audio]" for i in range(1, 9)]
+    assert output_file.read_text().splitlines() == texts
+
+
+def test_decoder_waits_for_a_free_worker(textify, tmp_path):
+    produced = 0
+    produced_while_blocked = []
+    release = threading.Event()
+
+    def chunks():
+        nonlocal produced
+        for chunk in make_chunks(textify, 12):
+            produced += 1
+            yield chunk
+
+    def transcribe(audio):
+        release.wait(5)
+        return textify.stub_transcribe(audio)
+
+    def unblock():
+        produced_while_blocked.append(produced)
+        release.set()
+
+    timer = threading.Timer(0.2, unblock)
+    timer.start()
+    texts = textify.transcribe_audio_chunks(chunks(), str(tmp_path / "out.txt"), transcribe, max_workers=2, queue_size=2)
+
+    # Two chunks held by the workers, two queued and one waiting to be queued
+    assert produced_while_blocked == [5]
+    assert len(texts) == 12
+
+
+def test_first_failure_stops_the_pipeline(textify, tmp_path):
+    produced = 0
+
+    def chunks():
+        nonlocal produced
+        for chunk in make_chunks(textify, 50):
+            produced += 1
+            yield chunk
+
+    def transcribe(audio):
+        if audio.name == "chunk_2.wav":
+            raise RuntimeError("rate limited")
+        time.sleep(0.01)
+        return textify.stub_transcribe(audio)
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        textify.transcribe_audio_chunks(chunks(), str(tmp_path / "out.txt"), transcribe, max_workers=2, queue_size=2)
+    assert produced < 50
+    assert not (tmp_path / "out.txt").exists()
+
+
+def test_chunks_decoded_from_a_file_are_transcribed(textify, tmp_path):
+    # Tone with a second of silence every 3 seconds, 10 seconds long
+    t = np.arange(SAMPLE_RATE * 10) / SAMPLE_RATE
+    samples = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    for start in range(2, 10, 3):
+        samples[start * SAMPLE_RATE:(start + 1) * SAMPLE_RATE] = 0
+    audio_file = tmp_path / "talk.wav"
+    with wave.open(str(audio_file), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+    chunks = textify.extract_audio_chunks(str(audio_file), chunk_duration_sec=3, tolerance_sec=1)
+    texts = textify.transcribe_audio_chunks(chunks, str(tmp_path / "out.txt"), textify.stub_transcribe)
+
+    durations = [float(text.split(": ")[1].split("s")[0]) for text in texts]
+    assert sum(durations) == pytest.approx(10, abs=0.1)
+    assert all(duration <= 4 for duration in durations)
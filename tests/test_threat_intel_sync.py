@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import load_script
+from fixtures import otx_stub
+
+threat_intel = load_script("AI/ThreatIntelDaily.py")
+
+PULSES = [otx_stub.make_pulse(n, f"2024-01-{n + 1:02d}T00:00:00") for n in range(12)]
+
+
+@pytest.fixture
+def otx(serve, monkeypatch):
+    app = otx_stub.create_app(PULSES)
+    server = serve(app)
+    monkeypatch.setattr(threat_intel, "otx", threat_intel.OTXClient("key", base_url=f"{server.url}/api/v1", max_retries=0))
+    monkeypatch.setattr(threat_intel, "PAGE_LIMIT", 5)
+    return app
+
+
+@pytest.fixture
+def conn():
+    conn = threat_intel.open_pulse_store(":memory:")
+    yield conn
+    conn.close()
+
+
+def stored_ids(conn):
+    return sorted(row[0] for row in conn.execute("SELECT id FROM pulses"))
+
+
+def test_first_sync_fetches_numbered_pages(otx, conn):
+    assert threat_intel.sync_pulses(conn) == 12
+
+    # The first page gives the count, the other two are requested by number
+    assert sorted(req.get("page", "1") for req in otx.config["REQUESTS"]) == ["1", "2", "3"]
+    assert all("modified_since" not in req for req in otx.config["REQUESTS"])
+    assert stored_ids(conn) == sorted(pulse["id"] for pulse in PULSES)
+    assert threat_intel.get_sync_cursor(conn) == "2024-01-12T00:00:00"
+
+
+def test_next_sync_asks_only_for_newer_pulses(otx, conn):
+    threat_intel.sync_pulses(conn)
+    otx.config["REQUESTS"].clear()
+    otx.config["PULSES"].append(otx_stub.make_pulse(12, "2024-02-01T00:00:00"))
+
+    assert threat_intel.sync_pulses(conn) == 1
+    assert otx.config["REQUESTS"] == [{"limit": "5", "modified_since": "2024-01-12T00:00:00"}]
+    assert threat_intel.get_sync_cursor(conn) == "2024-02-01T00:00:00"
+
+    # Nothing changed since, so the cursor stays put
+    assert threat_intel.sync_pulses(conn) == 0
+    assert threat_intel.get_sync_cursor(conn) == "2024-02-01T00:00:00"
+
+
+def test_pages_without_count_follow_next_links(otx, conn):
+    otx.config["COUNT"] = False
+    assert threat_intel.sync_pulses(conn) == 12
+
+    assert [req.get("page", "1") for req in otx.config["REQUESTS"]] == ["1", "2", "3"]
+    assert stored_ids(conn) == sorted(pulse["id"] for pulse in PULSES)
+
+
+@pytest.mark.parametrize("count", [True, False])
+def test_failed_page_keeps_the_cursor(otx, conn, count):
+    threat_intel.sync_pulses(conn)
+    otx.config["PULSES"].extend(otx_stub.make_pulse(n, f"2024-02-{n:02d}T00:00:00") for n in range(12, 24))
+    otx.config["COUNT"] = count
+    otx.config["FAIL_PAGES"] = {2}
+
+    assert threat_intel.sync_pulses(conn) is None
+    assert threat_intel.get_sync_cursor(conn) == "2024-01-12T00:00:00"
+
+    # The next run starts over from the same cursor and gets every page
+    otx.config["FAIL_PAGES"] = set()
+    otx.config["REQUESTS"].clear()
+    assert threat_intel.sync_pulses(conn) == 12
+    assert all(req["modified_since"] == "2024-01-12T00:00:00" for req in otx.config["REQUESTS"])
+    assert threat_intel.get_sync_cursor(conn) == "2024-02-23T00:00:00"
+    assert len(stored_ids(conn)) == 24
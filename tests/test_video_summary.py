@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+import yt_dlp
+
+from conftest import load_script
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def video_summary():
+    return load_script("AI/VideoSummary.py")
+
+
+def write_audio(path, seconds):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(np.zeros(SAMPLE_RATE * seconds, dtype=np.int16).tobytes())
+    return str(path)
+
+
+def summarize_stub(video_summary, audio_file, **kwargs):
+    return video_summary.map_reduce_summarize(
+        audio_file, video_summary.stub_transcribe, video_summary.stub_summarize, video_summary.stub_combine,
+        segment_duration_sec=1, **kwargs,
+    )
+
+
+def test_short_audio_is_summarized_in_one_call(video_summary, tmp_path):
+    tokens = []
+    summary = summarize_stub(video_summary, write_audio(tmp_path / "short.wav", 1), on_token=tokens.append)
+
+    assert summary == "Summary of [1s of speech from segment_1.wav]"
+    assert "".join(tokens).strip() == summary
+
+
+def test_segment_summaries_are_reduced_in_order(video_summary, tmp_path):
+    events = []
+    tokens = []
+    summary = summarize_stub(
+        video_summary, write_audio(tmp_path / "long.wav", 20), max_workers=3,
+        progress=events.append, on_token=tokens.append,
+    )
+
+    assert [part.split("from ")[1].rstrip("]") for part in summary.split(" | ")] == [
+        f"segment_{i}.wav" for i in range(1, 21)
+    ]
+    # 20 partial summaries are combined in groups of REDUCE_FAN_IN, then once more
+    assert [event["parts"] for event in events if event["type"] == "reduce"] == [20, 3]
+    assert sorted(event["segment"] for event in events if event["type"] == "summarize") == list(range(1, 21))
+    assert "".join(tokens).strip() == summary
+
+
+def test_segments_are_decoded_as_workers_free_up(video_summary, tmp_path, monkeypatch):
+    live = set()
+    peak = 0
+    lock = threading.Lock()
+    make_wav_buffer = video_summary.make_wav_buffer
+
+    def tracked_wav_buffer(pcm, name):
+        nonlocal peak
+        with lock:
+            live.add(name)
+            peak = max(peak, len(live))
+        return make_wav_buffer(pcm, name)
+
+    def transcribe(audio):
+        time.sleep(0.01)
+        with lock:
+            live.discard(audio.name)
+        return video_summary.stub_transcribe(audio)
+
+    monkeypatch.setattr(video_summary, "make_wav_buffer", tracked_wav_buffer)
+    video_summary.map_reduce_summarize(
+        write_audio(tmp_path / "long.wav", 40), transcribe, video_summary.stub_summarize,
+        video_summary.stub_combine, segment_duration_sec=1, max_workers=2,
+    )
+
+    # One segment per worker, plus the one decoded while waiting for a worker
+    assert peak <= 3
+
+
+def test_failed_segment_fails_the_summary(video_summary, tmp_path):
+    def transcribe(audio):
+        if audio.name == "segment_3.wav":
+            raise RuntimeError("Whisper unavailable")
+        return video_summary.stub_transcribe(audio)
+
+    with pytest.raises(RuntimeError, match="Whisper unavailable"):
+        video_summary.map_reduce_summarize(
+            write_audio(tmp_path / "long.wav", 6), transcribe, video_summary.stub_summarize,
+            video_summary.stub_combine, segment_duration_sec=1,
+        )
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?t=42",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+])
+def test_youtube_links_give_the_video_id(video_summary, url):
+    assert video_summary.extract_video_id(url) == "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    "https://youtu.be/",
+    "https://www.youtube.com/watch?v=short",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ%0A",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQextra",
+])
+def test_youtube_links_without_an_id_are_rejected(video_summary, url):
+    with pytest.raises(ValueError):
+        video_summary.extract_video_id(url)
+
+
+class FakeYoutubeDL:
+    def __init__(self, params):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def extract_info(self, url, download):
+        if "unsupported" in url:
+            raise yt_dlp.utils.DownloadError("Unsupported URL")
+        return {"id": "dQw4w9WgXcQ", "extractor_key": "Generic"}
+
+
+@pytest.fixture
+def fake_yt_dlp(video_summary, monkeypatch):
+    monkeypatch.setattr(video_summary.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+
+
+@pytest.mark.parametrize("url", [
+    "https://evil.example/clip.mp4?v=dQw4w9WgXcQ",
+    "https://notyoutu.be/dQw4w9WgXcQ",
+    "https://youtube.com.evil.example/watch?v=dQw4w9WgXcQ",
+])
+def test_other_sites_are_keyed_by_extractor(video_summary, fake_yt_dlp, url):
+    assert video_summary.extract_video_id(url) == "Generic:dQw4w9WgXcQ"
+
+
+def test_unsupported_url_is_rejected(video_summary, fake_yt_dlp):
+    with pytest.raises(ValueError, match="Not a supported video URL"):
+        video_summary.extract_video_id("https://unsupported.example/")
+
+
+def test_stream_sends_the_job_status_before_any_progress(video_summary, monkeypatch):
+    release = threading.Event()
+
+    def run_job(job_id, video_url, video_id):
+        release.wait(5)
+        video_summary.finish_job(job_id, {"type": "done", "summary": "Stub summary"}, status="done", summary="Stub summary")
+
+    monkeypatch.setattr(video_summary, "run_job", run_job)
+    client = video_summary.app.test_client()
+    response = client.get("/stream?video_url=https://youtu.be/aaaaaaaaaaa", buffered=False)
+    events = iter(response.response)
+
+    # The first event arrives while the job is still waiting on its download
+    started = time.monotonic()
+    first = json.loads(next(events).decode().removeprefix("data: "))
+    assert time.monotonic() - started < 1
+    assert first["type"] == "status" and first["status"] in ("queued", "running")
+
+    release.set()
+    last = json.loads(next(events).decode().removeprefix("data: "))
+    assert last == {"type": "done", "summary": "Stub summary"}
+    response.close()